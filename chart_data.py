@@ -0,0 +1,219 @@
+# graphics/chart_data.py
+"""
+Chart datasets for the main dashboard, computed together.
+
+The dashboard used to call data_loader.get_charts_data once per chart,
+each call rebuilding its own frame. `chart_datasets` takes the filtered
+Tables once and builds every registered chart from shared per-dataset
+arrays (amounts, day numbers, label codes), each computed at most once:
+
+    charts = chart_datasets(invoices, jobs, customers, estimates)
+    revenue_sparkline(..., charts=charts)
+
+Builders read aggregates (per-label sums and counts, per-day series)
+from a ChartFrames; grouping runs on label codes (np.bincount) and only
+the per-label results, a handful of rows, go through pandas. Output frames are the same as the
+per-chart code produced: columns, order and "empty frame when there is no
+data" included. So are the labels: revenue_by_source puts every empty
+lead source under "Unknown" (`or "Unknown"`), while jobs_status and
+leads_by_source only rename missing values (`fillna("Unknown")`) and keep
+"" as a label of its own.
+
+Trends are bucketed by the span they cover: daily points up to
+TREND_MAX_POINTS days, then weekly (Monday) buckets, then monthly ones.
+Buckets are sums of the daily values, so a trend's total is the same at
+any bucket size; `frame.attrs["bucket"]` tells which size was used.
+Trends only cover rows with a timestamp, and revenue_trend sums invoice
+`amount`, so their totals are not the KPIs: revenue is paid amounts over
+all invoices, leads counts estimates or customers with a lead source.
+"""
+from __future__ import annotations
+
+from functools import cached_property
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from graphics.columnar import DAY_NS, NAT, Table
+
+__all__ = ["CHARTS", "TREND_MAX_POINTS", "ChartFrames", "register_chart", "build_charts", "chart_datasets"]
+
+TREND_MAX_POINTS = 120      # daily trend points before switching to weekly, then monthly buckets
+
+CHARTS: Dict[str, Callable[["ChartFrames"], pd.DataFrame]] = {}
+
+
+def register_chart(name: str):
+    """Decorator adding a dataset builder `fn(frames) -> DataFrame` under `name`."""
+    def deco(fn):
+        CHARTS[name] = fn
+        return fn
+    return deco
+
+
+def _days_to_dates(days):
+    return pd.to_datetime(np.asarray(days, dtype=np.int64) * DAY_NS).date
+
+
+def _bucketed(days: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, str]:
+    """(bucket start days, summed values, bucket size) for sorted day numbers."""
+    if not len(days) or days[-1] - days[0] < TREND_MAX_POINTS:
+        return days, values, "day"
+    starts = days - (days + 3) % 7                      # day 0 (1970-01-01) was a Thursday
+    bucket = "week"
+    if (starts[-1] - starts[0]) // 7 >= TREND_MAX_POINTS:
+        months = days.astype("datetime64[D]").astype("datetime64[M]")
+        starts = months.astype("datetime64[D]").astype(np.int64)
+        bucket = "month"
+    keys, first = np.unique(starts, return_index=True)
+    return keys, np.add.reduceat(values, first), bucket
+
+def _trend_frame(days: np.ndarray, values: np.ndarray, column: str, dtype) -> pd.DataFrame:
+    days, values, bucket = _bucketed(days, values)
+    out = pd.DataFrame({"date": _days_to_dates(days), column: values.astype(dtype)})
+    out.attrs["bucket"] = bucket
+    return out
+
+
+class ChartFrames:
+    """
+    The aggregates chart builders read, computed from the filtered Tables.
+
+    Builders only use the methods below, so another source of the same
+    aggregates (graphics.rollup answers them from pre-aggregated cubes)
+    can stand in for the rows. Label results are per code slot: slot 0 is
+    the missing code (-1), slot i + 1 is category i.
+    """
+
+    def __init__(self, invoices: Table, jobs: Table, customers: Table, estimates: Table):
+        self.tables = {"invoices": invoices, "jobs": jobs, "customers": customers, "estimates": estimates}
+
+    def categories(self, name: str, field: str) -> List:
+        return self.tables[name].categories(field)
+
+    def size(self, name: str) -> int:
+        return len(self.tables[name])
+
+    def any_present(self, name: str, field: str) -> bool:
+        return bool(self.tables[name].has(field).any())
+
+    @cached_property
+    def _revenue(self) -> Dict[str, np.ndarray]:
+        return {"jobs": np.nan_to_num(self.tables["jobs"].col("total_amount")),
+                "invoices": np.nan_to_num(self.tables["invoices"].col("amount"))}
+
+    @cached_property
+    def _days(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        out = {}
+        for name in ("invoices", "customers"):
+            t = self.tables[name].times()
+            ok = t != NAT
+            out[name] = (t[ok] // DAY_NS, ok)
+        return out
+
+    def revenue_by(self, name: str, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(revenue sum, row count) per label slot."""
+        slots = self.tables[name].col(field) + 1
+        n = len(self.categories(name, field)) + 1
+        return np.bincount(slots, weights=self._revenue[name], minlength=n), np.bincount(slots, minlength=n)
+
+    def count_by(self, name: str, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(row count, position of the first row) per label slot; unseen slots sort last."""
+        slots = self.tables[name].col(field) + 1
+        n = len(self.categories(name, field)) + 1
+        seen, first_row = np.unique(slots, return_index=True)
+        first = np.full(n, np.iinfo(np.int64).max)
+        first[seen] = first_row
+        return np.bincount(slots, minlength=n), first
+
+    def by_day(self, name: str, revenue: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted day numbers with timestamped rows, and their row count (or revenue sum)."""
+        days, ok = self._days[name]
+        if not revenue:
+            return np.unique(days, return_counts=True)
+        uniq, inverse = np.unique(days, return_inverse=True)
+        return uniq, np.bincount(inverse, weights=self._revenue[name][ok], minlength=len(uniq))
+
+
+# ---------- per-label frames ----------
+def _slot_labels(f: ChartFrames, name: str, field: str, label: Callable, missing) -> np.ndarray:
+    return np.array([missing] + [label(c) for c in f.categories(name, field)], dtype=object)
+
+def _revenue_by_label(f: ChartFrames, name: str, field: str, key: str,
+                      label: Callable = lambda c: c or "Unknown", missing="Unknown") -> pd.DataFrame:
+    """Like DataFrame({key: labels, "revenue": amounts}).groupby(key, as_index=False)["revenue"].sum()."""
+    sums, counts = f.revenue_by(name, field)
+    used = counts > 0
+    small = pd.DataFrame({key: _slot_labels(f, name, field, label, missing)[used], "revenue": sums[used]})
+    return small.groupby(key, as_index=False)["revenue"].sum()
+
+def _count_by_label(f: ChartFrames, name: str, field: str) -> pd.Series:
+    """Like pd.Series(labels).fillna("Unknown").value_counts(), ties kept in first-seen order."""
+    counts, first = f.count_by(name, field)
+    labels = _slot_labels(f, name, field, lambda c: c, "Unknown")
+    out: Dict = {}
+    for slot in np.argsort(first, kind="stable"):
+        if counts[slot]:
+            out[labels[slot]] = out.get(labels[slot], 0) + int(counts[slot])
+    return pd.Series(list(out.values()), index=pd.Index(list(out.keys()), dtype=object),
+                     dtype=np.int64, name="count").sort_values(ascending=False, kind="stable")
+
+
+# ---------- registered charts ----------
+@register_chart("revenue_by_job")
+def _revenue_by_job(f: ChartFrames) -> pd.DataFrame:
+    if not f.size("jobs") or not f.any_present("jobs", "description"):
+        return pd.DataFrame()
+    out = _revenue_by_label(f, "jobs", "description", "job", label=lambda c: c, missing=None)
+    return out.sort_values("revenue", ascending=False)
+
+@register_chart("revenue_by_source")
+def _revenue_by_source(f: ChartFrames) -> pd.DataFrame:
+    if not f.size("jobs"):
+        return pd.DataFrame()
+    out = _revenue_by_label(f, "jobs", "customer.lead_source", "source")
+    return out.sort_values("revenue", ascending=False)
+
+@register_chart("revenue_trend")
+def _revenue_trend(f: ChartFrames) -> pd.DataFrame:
+    if not f.size("invoices"):
+        return pd.DataFrame()
+    days, revenue = f.by_day("invoices", revenue=True)
+    return _trend_frame(days, revenue, "revenue", np.float64)
+
+@register_chart("jobs_status")
+def _jobs_status(f: ChartFrames) -> pd.DataFrame:
+    if not f.size("jobs") or not f.any_present("jobs", "work_status"):
+        return pd.DataFrame()
+    out = _count_by_label(f, "jobs", "work_status").reset_index()
+    out.columns = ["status", "count"]
+    return out
+
+@register_chart("leads_by_source")
+def _leads_by_source(f: ChartFrames) -> pd.DataFrame:
+    if not f.size("customers") or not f.any_present("customers", "lead_source"):
+        return pd.DataFrame()
+    out = _count_by_label(f, "customers", "lead_source").reset_index()
+    out.columns = ["source", "count"]
+    return out
+
+@register_chart("leads_trend")
+def _leads_trend(f: ChartFrames) -> pd.DataFrame:
+    if not f.size("customers"):
+        return pd.DataFrame()
+    days, counts = f.by_day("customers")
+    return _trend_frame(days, counts, "leads", np.int64)
+
+
+# ---------- engine ----------
+def build_charts(frames: ChartFrames, charts: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+    """Every registered chart dataset (or just `charts`) from one aggregate source, by name."""
+    names = CHARTS if charts is None else charts
+    return {name: CHARTS[name](frames) if name in CHARTS else pd.DataFrame() for name in names}
+
+
+def chart_datasets(invoices: Table, jobs: Table, customers: Table, estimates: Table,
+                   charts: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+    """Every registered chart dataset (or just `charts`) for the filtered Tables, by name."""
+    return build_charts(ChartFrames(invoices, jobs, customers, estimates), charts)
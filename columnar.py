@@ -0,0 +1,382 @@
+# graphics/columnar.py
+"""
+Columnar, typed tables built once per dataset version.
+
+Every dataset is converted from its list of JSON records into a Table:
+
+  • time field     -> int64 epoch nanoseconds, local wall-clock time (NAT when missing)
+  • number fields  -> float64 (NaN when missing or not numeric)
+  • label fields   -> int32 codes into the field's distinct values (-1 = missing/None)
+
+Each field also keeps a boolean "present" mask, so tolerant-schema code can
+still tell a missing key from a key holding null. The raw records are kept
+alongside for pages that render them as-is (details tables, globe, ...);
+a Table restored from a snapshot parses them on first use.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["NAT", "DAY_NS", "ROW_KEY", "SCHEMAS", "Table", "TableBuilder", "build_table", "parse_times",
+           "register_extender", "register_chunked", "row_keys"]
+
+NAT = np.iinfo(np.int64).min          # same bit pattern as pd.NaT
+DAY_NS = 86_400 * 1_000_000_000
+ROW_KEY = "row_key"                   # uint64 hash of (id, updated_at), kept for every dataset
+
+# Fields materialised per dataset. Anything not listed stays in the records.
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "invoices": {
+        "time": "invoice_date",
+        "numbers": ("amount", "due_amount", "balance", "amount_due",
+                    "grand_total", "total", "amount_paid", "paid_amount"),
+        "labels": ("status", "invoice_status", "payment_status"),
+    },
+    "jobs": {
+        "time": "created_at",
+        "numbers": ("total_amount",),
+        "labels": ("work_status", "status", "job_status", "description", "customer.lead_source"),
+    },
+    "customers": {
+        "time": "created_at",
+        "numbers": (),
+        "labels": ("lead_source", "leadSource"),
+    },
+    "estimates": {
+        "time": "created_at",
+        "numbers": (),
+        "labels": ("work_status",),
+    },
+}
+
+
+# ---------- conversion helpers ----------
+def _pluck(records: List[Dict[str, Any]], path: str):
+    """Values and key-presence of a (dotted) field across records."""
+    head, _, rest = path.partition(".")
+    if rest:
+        parents = [r.get(head) for r in records]
+        return _pluck([p if isinstance(p, dict) else {} for p in parents], rest)
+    present = np.fromiter((head in r for r in records), dtype=bool, count=len(records))
+    return [r.get(head) for r in records], present
+
+# UTC offset after an ISO time of day ("...T21:00:00-05:00", "...10:15Z")
+_OFFSET = r"(\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?)\s*(?:Z|[+-]\d{2}(?::?\d{2})?)$"
+
+def _wall_clock(value):
+    """One timestamp as its local wall-clock time, offset dropped (NaT on failure)."""
+    try:
+        t = pd.to_datetime(value, errors="coerce")
+        return t.tz_localize(None) if not pd.isna(t) and t.tzinfo is not None else t
+    except Exception:
+        return pd.NaT
+
+def parse_times(values) -> np.ndarray:
+    """
+    Parse timestamps to tz-naive epoch nanoseconds (NAT on failure). As in
+    the sidebar's original per-record parse, a UTC offset is dropped, not
+    applied: "2025-02-28T21:00:00-05:00" is 21:00 on Feb 28.
+    """
+    s = pd.Series(values, dtype=object)
+    text = np.fromiter((isinstance(v, str) for v in s), dtype=bool, count=len(s))
+    local = s.copy()
+    if text.any():
+        local[text] = s[text].str.replace(_OFFSET, r"\1", regex=True)
+    try:
+        ts = pd.to_datetime(local, errors="coerce", format="ISO8601")
+    except (TypeError, ValueError):     # offsets the pattern doesn't cover: parse per value
+        ts = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+    retry = ts.isna() & s.notna()
+    if retry.any():
+        # Non-ISO leftovers: slower per-value parsing, only for those rows
+        ts = ts.astype("datetime64[ns]")
+        ts[retry] = pd.to_datetime(s[retry].map(_wall_clock), errors="coerce")
+    return ts.astype("datetime64[ns]").to_numpy().view(np.int64)
+
+def _parse_numbers(values) -> np.ndarray:
+    s = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+    return s.to_numpy(dtype=np.float64, na_value=np.nan)
+
+def row_keys(records: List[Dict[str, Any]]) -> np.ndarray:
+    """Identity of each record version: its id and updated_at, or its whole content without an id."""
+    keys = np.array([f"{r['id']}\x1f{r.get('updated_at')}" if r.get("id") is not None
+                     else json.dumps(r, sort_keys=True, default=str) for r in records], dtype=object)
+    return pd.util.hash_array(keys) if len(keys) else np.empty(0, dtype=np.uint64)
+
+def _hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return str(value)
+    return value
+
+def _encode_labels(values):
+    s = pd.Series(values, dtype=object)
+    try:
+        codes, uniques = pd.factorize(s)
+    except TypeError:
+        # unhashable values (lists/dicts) are compared by their text form; the others keep theirs
+        codes, uniques = pd.factorize(s.map(_hashable))
+    return codes.astype(np.int32), list(uniques)
+
+
+# ---------- derived-data extenders ----------
+# When a table grows by appended rows (incremental reload), derived data
+# registered here is extended instead of rebuilt:
+#     fn(old_value, table, start, records) -> new value
+# with `table` the grown base table and `records` the rows from `start` on.
+_EXTENDERS: Dict[Any, Callable[[Any, "Table", int, List[Dict[str, Any]]], Any]] = {}
+
+def register_extender(key: Any, fn: Callable[[Any, "Table", int, List[Dict[str, Any]]], Any]) -> None:
+    _EXTENDERS[key] = fn
+
+# Derived data a TableBuilder can build chunk by chunk as the records stream
+# past (TableBuilder(derive=...)), so even a columns-only table has it:
+#     step(partial, start, records, partials) -> partial covering rows up to start + len(records)
+#     finish(partial, table) -> value (the partial itself without one)
+# `partial` is None on the first chunk; `partials` holds the other keys'
+# partials, those listed before this key already including the chunk.
+_CHUNKED: Dict[Any, tuple] = {}
+
+def register_chunked(key: Any, step: Callable[[Any, int, List[Dict[str, Any]], Dict[Any, Any]], Any],
+                     finish: Optional[Callable[[Any, "Table"], Any]] = None) -> None:
+    _CHUNKED[key] = (step, finish)
+
+
+# ---------- table ----------
+class Table:
+    """
+    A dataset as typed columns plus the raw records they were built from.
+
+    `take(rows)` returns a view over the same columns and records, so
+    filtering hands row ids downstream instead of copying data. Views
+    iterate, index and len() like the record lists they replace.
+    """
+
+    def __init__(self, name: str, records: Optional[List[Dict[str, Any]]], columns: Dict[str, np.ndarray],
+                 present: Dict[str, np.ndarray], categories: Dict[str, List[Any]], version: Any = None,
+                 load_records: Optional[Callable[[], List[Dict[str, Any]]]] = None):
+        """`records` may be None when `load_records` can produce them on first use."""
+        self.name = name
+        self.version = version
+        self.base = self
+        self.rows: Optional[np.ndarray] = None
+        self._n = len(records) if records is not None else len(next(iter(columns.values()), ()))
+        self._records = records
+        self._load_records = load_records
+        self._columns = columns
+        self._present = present
+        self._categories = categories
+        self._derived: Dict[Any, Any] = {}
+        self._lock = threading.RLock()   # builders may derive from other derived data
+        self._records_lock = threading.Lock()   # a slow record parse doesn't hold up derived data
+
+    # --- views ---
+    def take(self, rows) -> "Table":
+        rows = np.asarray(rows, dtype=np.intp)
+        view = object.__new__(Table)
+        view.name = self.name
+        view.version = self.version
+        view.base = self.base
+        view.rows = rows if self.rows is None else self.rows[rows]
+        return view
+
+    def where(self, mask: np.ndarray) -> "Table":
+        return self.take(np.flatnonzero(mask))
+
+    def row_ids(self) -> np.ndarray:
+        return np.arange(self.base._n) if self.rows is None else self.rows
+
+    def cached(self, key: Any, build: Callable[["Table"], Any]) -> Any:
+        """
+        Derived structure (search text, indexes, ...) built once per version.
+
+        Always built over, and stored on, the base table; views share it.
+        """
+        base = self.base
+        with base._lock:
+            if key not in base._derived:
+                base._derived[key] = build(base)
+            return base._derived[key]
+
+    # --- records ---
+    def __len__(self) -> int:
+        return self.base._n if self.rows is None else len(self.rows)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.records)
+
+    def __getitem__(self, i):
+        recs = self.base._all_records()
+        return recs[i] if self.rows is None else recs[self.rows[i]]
+
+    def _all_records(self) -> List[Dict[str, Any]]:
+        if self._records is None:
+            with self._records_lock:
+                if self._records is None:
+                    self._records = self._load_records()
+        return self._records
+
+    @property
+    def records_loaded(self) -> bool:
+        return self.base._records is not None
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        recs = self.base._all_records()
+        return recs if self.rows is None else [recs[i] for i in self.rows]
+
+    # --- columns ---
+    @property
+    def time_field(self) -> Optional[str]:
+        return SCHEMAS.get(self.name, {}).get("time")
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.base._columns
+
+    def col(self, field: str) -> np.ndarray:
+        arr = self.base._columns[field]
+        return arr if self.rows is None else arr[self.rows]
+
+    def times(self) -> np.ndarray:
+        return self.col(self.time_field)
+
+    def has(self, field: str) -> np.ndarray:
+        arr = self.base._present[field]
+        return arr if self.rows is None else arr[self.rows]
+
+    def categories(self, field: str) -> List[Any]:
+        return self.base._categories[field]
+
+    def map_labels(self, field: str, fn: Callable[[Any], Any], missing: Any = None, dtype=object) -> np.ndarray:
+        """Apply `fn` once per distinct label and broadcast the result to rows."""
+        lookup = np.array([fn(c) for c in self.categories(field)] + [missing], dtype=dtype)
+        return lookup[self.col(field)]          # code -1 picks `missing`
+
+    def labels(self, field: str, missing: Any = "Unknown") -> np.ndarray:
+        """Row labels with empty/None values reported as `missing` (the sidebar's convention)."""
+        return self.map_labels(field, lambda c: c or missing, missing)
+
+    def total(self, field: str) -> float:
+        return float(np.nansum(self.col(field))) if field in self else 0.0
+
+
+class TableBuilder:
+    """
+    Builds a Table one chunk of records at a time.
+
+    Each chunk is converted to typed column parts as it arrives, so only a
+    chunk's worth of intermediate pandas objects is alive at once. Label
+    codes are remapped onto one shared dictionary per field.
+    """
+
+    def __init__(self, name: str, version: Any = None, head: Optional[Table] = None,
+                 keep_records: bool = True, derive: Sequence[Any] = ()):
+        """
+        With `head`, the built table continues it: its rows first, then the
+        appended ones. Without `keep_records`, chunks are dropped once
+        converted and the table only has its columns (e.g. to write them
+        to the column store). `derive` lists register_chunked keys built
+        along the way, in that order (not with `head`, whose derived data
+        is extended instead).
+        """
+        if head is not None and derive:
+            raise ValueError("derive can't be combined with head")
+        schema = SCHEMAS.get(name, {})
+        self.name = name
+        self.version = version
+        self.keep_records = keep_records or head is not None
+        self.records: List[Dict[str, Any]] = []
+        self._head = head.base if head is not None else None
+        self._time = schema.get("time")
+        self._numbers = schema.get("numbers", ())
+        self._labels = schema.get("labels", ())
+        fields = ([self._time] if self._time else []) + list(self._numbers) + list(self._labels)
+        self._parts: Dict[str, List[np.ndarray]] = {f: [] for f in fields + [ROW_KEY]}
+        self._present: Dict[str, List[np.ndarray]] = {f: [] for f in fields + [ROW_KEY]}
+        self._categories: Dict[str, List[Any]] = {f: [] for f in self._labels}
+        if self._head is not None:
+            for f in self._parts:
+                self._parts[f].append(self._head._columns[f])
+                self._present[f].append(self._head._present[f])
+            self._categories = {f: list(self._head._categories[f]) for f in self._labels}
+        self._codes: Dict[str, Dict[Any, int]] = {f: {v: i for i, v in enumerate(c)}
+                                                  for f, c in self._categories.items()}
+        self._chunks = 0
+        self._rows = 0
+        self._partials: Dict[Any, Any] = {key: None for key in derive}
+
+    def _add(self, field: str, has: np.ndarray, column: np.ndarray) -> None:
+        self._present[field].append(has)
+        self._parts[field].append(column)
+
+    def append(self, chunk) -> None:
+        chunk = chunk if isinstance(chunk, list) else list(chunk)
+        if self.keep_records:
+            self.records.extend(chunk)
+        for key in self._partials:
+            self._partials[key] = _CHUNKED[key][0](self._partials[key], self._rows, chunk, self._partials)
+        self._chunks += 1
+        self._rows += len(chunk)
+        self._add(ROW_KEY, np.ones(len(chunk), dtype=bool), row_keys(chunk))
+        if self._time:
+            values, has = _pluck(chunk, self._time)
+            self._add(self._time, has, parse_times(values))
+        for field in self._numbers:
+            values, has = _pluck(chunk, field)
+            self._add(field, has, _parse_numbers(values))
+        for field in self._labels:
+            values, has = _pluck(chunk, field)
+            codes, uniques = _encode_labels(values)
+            known, cats = self._codes[field], self._categories[field]
+            remap = np.full(len(uniques) + 1, -1, dtype=np.int32)    # last slot keeps -1
+            for i, value in enumerate(uniques):
+                if value not in known:
+                    known[value] = len(cats)
+                    cats.append(value)
+                remap[i] = known[value]
+            self._add(field, has, remap[codes])
+
+    def finish(self, load_records: Optional[Callable[[], List[Dict[str, Any]]]] = None,
+               extend: bool = True) -> Table:
+        """
+        The built Table. A continued head's derived data is carried over
+        where an extender is registered (unless `extend` is False); the rest
+        is rebuilt on demand. `load_records` is only used when the records
+        weren't kept, or the head's aren't loaded.
+        """
+        if not self._chunks:
+            self.append([])
+        columns = {f: np.concatenate(parts) for f, parts in self._parts.items()}
+        present = {f: np.concatenate(parts) for f, parts in self._present.items()}
+        head = self._head
+        if head is None:
+            table = Table(self.name, self.records if self.keep_records else None, columns, present,
+                          self._categories, version=self.version, load_records=load_records)
+            for key, partial in self._partials.items():
+                finish = _CHUNKED[key][1]
+                table._derived[key] = partial if finish is None else finish(partial, table)
+            return table
+        records = head._records + self.records if head.records_loaded else None
+        table = Table(self.name, records, columns, present, self._categories, version=self.version,
+                      load_records=load_records)
+        with head._lock:
+            derived = dict(head._derived) if extend else {}
+        for key, value in derived.items():
+            if key in _EXTENDERS:
+                table._derived[key] = _EXTENDERS[key](value, table, len(head), self.records)
+        return table
+
+
+def build_table(name: str, records, version: Any = None, chunk_rows: int = 50_000) -> Table:
+    """Convert one dataset's records into a Table (see module docstring)."""
+    records = records if isinstance(records, list) else list(records or [])
+    builder = TableBuilder(name, version=version)
+    for start in range(0, len(records), chunk_rows):
+        builder.append(records[start:start + chunk_rows])
+    return builder.finish()
@@ -1,29 +1,38 @@
 import streamlit as st
 import pandas as pd
-import json
-import os
 import plotly.express as px
 import plotly.graph_objects as go
+from graphics.data_loader import FILES, load_reports, load_table, result_cache_stats
+from graphics.flat_frame import flat_frame
+from graphics.figure_cache import figure_stats
 
-DATA_FOLDER = "ERROR"
-
-def load_json(filename):
-    with open(os.path.join(DATA_FOLDER, filename), encoding="utf-8") as f:
-        return json.load(f)
+CUSTOMER_COLUMNS = ["first_name", "last_name", "email", "lead_source", "created_at", "updated_at"]
 
 def show_data_info():
     st.markdown("# 👥 Customers")
     st.markdown("<div class='subtitle'>Customer Insights & Details</div>", unsafe_allow_html=True)
 
     # --- Load datasets ---
-    customers = load_json("customers_data.json")
-    jobs = load_json("jobs_data.json")
-    leads = load_json("estimates_data.json")   # using estimates as leads
-    invoices = load_json("invoices_data.json")
-
-    df_customers = pd.json_normalize(customers)
-    df_jobs = pd.json_normalize(jobs)
-    df_leads = pd.json_normalize(leads)
+    customers = load_table("customers")
+    jobs = load_table("jobs")
+    leads = load_table("estimates")   # using estimates as leads
+    invoices = load_table("invoices")
+
+    for name, report in load_reports().items():
+        if report["malformed"]:
+            st.warning(f"{FILES[name]}: skipped {report['malformed']:,} malformed record(s).")
+
+    cache = result_cache_stats()
+    st.caption(f"Filter result cache: {cache['hit_ratio']:.0%} hits over {cache['hits'] + cache['misses']:,} lookups, "
+               f"{cache['entries']} entries, {cache['bytes'] / 2**20:.1f} / {cache['max_bytes'] / 2**20:.0f} MB")
+    figures = figure_stats()
+    if figures:
+        st.caption("Figure builds (last): " + ", ".join(
+            f"{name} {f['build_ms']:.0f} ms ({f['builds']:.0f} built, {f['hits']:.0f} reused)"
+            for name, f in figures.items()))
+
+    # Flattened once per dataset version (graphics.flat_frame), projected to the columns used here
+    df_customers = flat_frame(customers, CUSTOMER_COLUMNS)
 
     if df_customers.empty:
         st.warning("No customer data available.")
@@ -50,7 +59,7 @@ def show_data_info():
         st.markdown(f"""
             <div class='card kpi-card'>
                 <div class='card-header'>🧲 Leads</div>
-                <div class='kpi-value'>{len(df_leads):,}</div>
+                <div class='kpi-value'>{len(leads):,}</div>
             </div>
         """, unsafe_allow_html=True)
 
@@ -58,7 +67,7 @@ def show_data_info():
         st.markdown(f"""
             <div class='card kpi-card'>
                 <div class='card-header'>🗂 Jobs</div>
-                <div class='kpi-value'>{len(df_jobs):,}</div>
+                <div class='kpi-value'>{len(jobs):,}</div>
             </div>
         """, unsafe_allow_html=True)
 
@@ -1,5 +1,17 @@
-import json, os
-import pandas as pd
+import os, threading, time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from graphics.chart_data import chart_datasets
+from graphics.columnar import TableBuilder, build_table
+from graphics.filter_engine import filter_key, filter_rows, normalize_filters
+from graphics.flat_frame import flat_column, flat_schema
+from graphics.geo_index import address_index
+from graphics.json_stream import ArrayReader
+from graphics.incremental import reload_table, source_state
+from graphics.snapshot import load_snapshot, save_snapshot
+from graphics.result_cache import RESULTS
+from graphics.rollup import dashboard_summary
+from graphics import metrics
 
 # All JSON files expected at project root (same level as main.py)
 DATA_FOLDER = "ERROR"
@@ -11,150 +23,270 @@ FILES = {
     "estimates": "estimates_data.json",
 }
 
+LOAD_CHUNK_ROWS = 50_000   # records handed to the columnar builder at a time
+USE_SNAPSHOTS = True       # serve columns from the memory-mapped store next to the exports (graphics.snapshot)
+LOAD_WORKERS = 4           # datasets load_data reads at once (1 = one after another)
+PARSE_IN_PROCESSES = True  # cold parses run in worker processes, handed back through the column store
+PARSE_PROCESS_MIN_BYTES = 8 << 20   # smaller exports parse faster than a worker process starts
+# record-derived data the Graphics page reads first (globe, details tables), built while parsing
+# and stored with the columns, so neither a worker's parse nor a restart needs the records again
+FIRST_RENDER = ("geo_addresses", "flat_schema", "flat_columns")
+
+def _read_table(name, path, version, loader=None):
+    """
+    Stream one JSON export into a Table; returns (table, report). Records
+    are dropped once converted, so memory holds a chunk of them at most
+    besides the columns and FIRST_RENDER data; `loader(n_rows)` supplies
+    the deferred parse for features that want them (search).
+    """
+    builder = TableBuilder(name, version=version, keep_records=False, derive=FIRST_RENDER)
+    report = {"records": 0, "malformed": 0, "error": None}
+    rows = 0
+    try:
+        with open(path, encoding="utf-8-sig", errors="replace") as f:
+            reader = ArrayReader(f)
+            try:
+                for chunk in reader.chunks(LOAD_CHUNK_ROWS):
+                    builder.append(chunk)
+                    rows += len(chunk)
+            finally:
+                report.update(records=reader.records, malformed=reader.malformed)
+    except Exception as e:  # keep whatever was read before the failure
+        report["error"] = str(e)
+    return builder.finish(loader(rows) if loader is not None else None), report
+
+def _parse_to_snapshot(name, path, version):
+    """
+    Worker-process side of _parse: parse the export and write its column
+    store, with the FIRST_RENDER data but without the records.
+    """
+    table, report = _read_table(name, path, version)
+    if report["error"] is None and not save_snapshot(table, path, version, report):
+        report["error"] = "column store not written"
+    return report
+
+_PARSE_POOL = None
+_PARSE_POOL_LOCK = threading.Lock()
+
+def _parse_pool():
+    global _PARSE_POOL
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is None:
+            # spawn: forking a server process that runs threads isn't safe
+            _PARSE_POOL = ProcessPoolExecutor(max(1, LOAD_WORKERS), mp_context=multiprocessing.get_context("spawn"))
+        return _PARSE_POOL
+
+def _parse(name, path, version, size, loader):
+    """
+    (table, report) parsed from the export. JSON decoding holds the GIL, so
+    with PARSE_IN_PROCESSES it runs in a worker process that writes the
+    column store, which is then memory-mapped here. The store carries the
+    FIRST_RENDER data, so this process doesn't parse the records again.
+    """
+    if PARSE_IN_PROCESSES and USE_SNAPSHOTS and LOAD_WORKERS > 1 and size >= PARSE_PROCESS_MIN_BYTES:
+        try:
+            report = _parse_pool().submit(_parse_to_snapshot, name, path, version).result()
+        except Exception:       # broken pool, unpicklable error, ...: parse here instead
+            report = None
+        if report is not None and report["error"] is None:
+            loaded = load_snapshot(path, version, name, loader)
+            if loaded is not None:
+                return loaded[0], report
+    return _read_table(name, path, version, loader)
+
 def _safe_load(path):
     try:
-        with open(path, encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, encoding="utf-8-sig", errors="replace") as f:
+            return list(ArrayReader(f))
     except Exception:
         return []
 
+def _records_loader(path, n_rows):
+    """Deferred record parse for a snapshot-backed Table; always yields `n_rows` records."""
+    def load():
+        records = _safe_load(path)[:n_rows]
+        # the export changed since the snapshot: keep row ids valid until the next reload
+        return records + [{} for _ in range(n_rows - len(records))]
+    return load
+
+def _derive_first_render(table):
+    """FIRST_RENDER data of a table that wasn't parsed with it (changed rows merged), to store it."""
+    address_index(table)
+    for column in flat_schema(table):
+        flat_column(table, column)
+
+def _read_source(name, path, previous):
+    """
+    (table, report, state) for a new or rewritten export. `previous` is the
+    store entry it replaces: appended or changed records are then merged
+    into that table (graphics.incremental) instead of parsing everything.
+    """
+    old_state = previous[2] if previous is not None else None
+    try:
+        state = source_state(path, mark=old_state["tail"] if old_state else None)
+    except OSError as e:
+        return build_table(name, []), {"records": 0, "malformed": 0, "error": str(e)}, None
+    loader = lambda n_rows: _records_loader(path, n_rows)
+    loaded = None
+    if old_state is not None:
+        loaded = reload_table(previous[1], path, old_state, state, _REPORTS.get(name), loader, LOAD_CHUNK_ROWS)
+        if loaded is not None:
+            with _STORE_LOCK:
+                _STORE_STATS["incremental"] += 1
+    if loaded is None and USE_SNAPSHOTS:
+        loaded = load_snapshot(path, state["digest"], name, loader)
+        if loaded is not None:
+            return loaded + (state,)
+    if loaded is None:
+        loaded = _parse(name, path, state["digest"], state["size"], loader)
+    table, report = loaded
+    if USE_SNAPSHOTS and report["error"] is None:
+        if table.records_loaded:
+            _derive_first_render(table)
+        save_snapshot(table, path, state["digest"], report)
+    return table, report, state
+
+# ---------- process-wide dataset store ----------
+# One entry per file path, shared by every session and rerun in this server
+# process. An entry is reused for as long as the file's (size, mtime) is
+# unchanged, so only the file that was actually rewritten is read again.
+# Loads are single-flight per path: sessions asking for a file that is
+# being loaded for the first time wait for that load instead of starting
+# their own, and while a file is reloaded the others keep being served the
+# previous table instead of stalling on the same reload.
+# Tables and their records are shared: callers must treat them as read-only.
+_STORE = {}
+_STORE_LOCK = threading.Lock()
+_STORE_STATS = {"hits": 0, "misses": 0, "incremental": 0}
+_REPORTS = {}
+_LOADING = {}       # path -> Event, set once that path's in-flight load is over
+
+def _file_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+def _load_cached(name):
+    path = os.path.join(DATA_FOLDER, FILES[name])
+    while True:
+        key = _file_key(path)
+        with _STORE_LOCK:
+            entry = _STORE.get(path)
+            if entry is not None and (entry[0] == key or path in _LOADING):
+                _STORE_STATS["hits"] += 1
+                return entry[1]
+            loading = _LOADING.get(path)
+            if loading is None:
+                _STORE_STATS["misses"] += 1
+                loading = _LOADING[path] = threading.Event()
+                break
+        loading.wait()      # cold start: another session is loading this file
+    started = time.perf_counter()
+    try:
+        if key is None:
+            table, report, state = build_table(name, []), {"records": 0, "malformed": 0, "error": "missing"}, None
+        else:
+            table, report, state = _read_source(name, path, entry)
+        with _STORE_LOCK:
+            _STORE[path] = (key, table, state)
+            _REPORTS[name] = {**report, "seconds": time.perf_counter() - started}
+    finally:
+        with _STORE_LOCK:
+            del _LOADING[path]
+        loading.set()
+    return table
+
+def load_table(name):
+    """Typed Table of one dataset (see graphics.columnar), served from the shared store."""
+    return _load_cached(name)
+
+def cache_stats():
+    """Hit/miss counters of the shared dataset store (and how many reloads were incremental)."""
+    with _STORE_LOCK:
+        return {**_STORE_STATS, "files": len(_STORE)}
+
+def load_reports():
+    """Per-dataset outcome of the last load: records kept, malformed records skipped, error, seconds taken."""
+    with _STORE_LOCK:
+        return {name: dict(r) for name, r in _REPORTS.items()}
+
+_LOAD_POOL = None
+
+def _load_pool():
+    global _LOAD_POOL
+    with _PARSE_POOL_LOCK:
+        if _LOAD_POOL is None:
+            _LOAD_POOL = ThreadPoolExecutor(max(1, LOAD_WORKERS), thread_name_prefix="load_data")
+        return _LOAD_POOL
+
 def load_data():
-    invoices = _safe_load(os.path.join(DATA_FOLDER, FILES["invoices"]))
-    jobs = _safe_load(os.path.join(DATA_FOLDER, FILES["jobs"]))
-    customers = _safe_load(os.path.join(DATA_FOLDER, FILES["customers"]))
-    estimates = _safe_load(os.path.join(DATA_FOLDER, FILES["estimates"]))
+    # the four files load concurrently: a cold start takes about as long as the largest one
+    names = ("invoices", "jobs", "customers", "estimates")
+    if LOAD_WORKERS > 1:
+        invoices, jobs, customers, estimates = _load_pool().map(load_table, names)
+    else:
+        invoices, jobs, customers, estimates = map(load_table, names)
     return invoices, jobs, customers, estimates
 
 def get_kpis(invoices, jobs, customers, estimates):
-    df_inv = pd.DataFrame(invoices)
-    revenue = float(df_inv.get("amount", pd.Series(dtype=float)).fillna(0).sum()) if not df_inv.empty else 0.0
-    outstanding = float(df_inv.get("due_amount", pd.Series(dtype=float)).fillna(0).sum()) if not df_inv.empty else 0.0
-    jobs_booked = len(jobs)
-    leads_count = len(customers)
-    return {
-        "revenue": revenue,
-        "outstanding_balance": outstanding,
-        "jobs_booked": jobs_booked,
-        "leads_count": leads_count,
-    }
-
-def _to_naive(ts):
-    """Convert to pandas Timestamp (tz-naive). Returns pd.NaT on failure."""
-    try:
-        t = pd.to_datetime(ts, errors="coerce")
-        if pd.isna(t):
-            return pd.NaT
-        # If a DatetimeIndex/Timestamp with tz, strip it
-        try:
-            return t.tz_localize(None)
-        except Exception:
-            # Already tz-naive
-            return t
-    except Exception:
-        return pd.NaT
+    """The dashboard KPIs (graphics.metrics.get_kpis), kept here for existing callers."""
+    return metrics.get_kpis(invoices, jobs, customers, estimates)
 
 def apply_filters(invoices, jobs, customers, estimates, filters):
-    # Normalize the sidebar date inputs (which may be date objects) to tz-naive Timestamps
-    date_from = _to_naive(filters.get("date_from")) if filters else None
-    date_to = _to_naive(filters.get("date_to")) if filters else None
-    search = (filters.get("search") or "").strip().lower() if filters else ""
-    lead_sources = set(filters.get("lead_sources") or []) if filters else set()
-    job_statuses = set(filters.get("job_statuses") or []) if filters else set()
-
-    # Invoices by date & search
-    if invoices:
-        for inv in invoices:
-            inv["_dt"] = _to_naive(inv.get("invoice_date"))
-        if date_from is not None or date_to is not None:
-            invoices = [
-                i for i in invoices
-                if (not pd.isna(i.get("_dt")))
-                and (date_from is None or i["_dt"] >= date_from)
-                and (date_to is None or i["_dt"] <= date_to)
-            ]
-        if search:
-            invoices = [i for i in invoices if search in json.dumps(i).lower()]
-
-    # Jobs by status & search & created_at
-    if jobs:
-        for j in jobs:
-            j["_dt"] = _to_naive(j.get("created_at"))
-        if job_statuses:
-            jobs = [j for j in jobs if (j.get("work_status") or "Unknown") in job_statuses]
-        if date_from is not None or date_to is not None:
-            jobs = [
-                j for j in jobs
-                if (not pd.isna(j.get("_dt")))
-                and (date_from is None or j["_dt"] >= date_from)
-                and (date_to is None or j["_dt"] <= date_to)
-            ]
-        if search:
-            jobs = [j for j in jobs if search in json.dumps(j).lower()]
-
-    # Customers by lead source & search & created_at
-    if customers:
-        for c in customers:
-            c["_dt"] = _to_naive(c.get("created_at"))
-        if lead_sources:
-            customers = [c for c in customers if (c.get("lead_source") or "Unknown") in lead_sources]
-        if date_from is not None or date_to is not None:
-            customers = [
-                c for c in customers
-                if (not pd.isna(c.get("_dt")))
-                and (date_from is None or c["_dt"] >= date_from)
-                and (date_to is None or c["_dt"] <= date_to)
-            ]
-        if search:
-            customers = [c for c in customers if search in json.dumps(c).lower()]
+    """Narrow the Tables to the sidebar filters; returns views over the same data."""
+    rows = filter_rows({"invoices": invoices, "jobs": jobs, "customers": customers}, filters)
+    return (
+        invoices.take(rows["invoices"]),
+        jobs.take(rows["jobs"]),
+        customers.take(rows["customers"]),
+        estimates,
+    )
 
-    return invoices, jobs, customers, estimates
+def dashboard_data(invoices, jobs, customers, estimates, filters, session=None):
+    """
+    (filtered views, KPIs, chart datasets) for the sidebar filters.
+
+    Results are kept in the shared result cache (graphics.result_cache),
+    keyed by the data versions and the normalised filters, so sessions
+    asking for the same view of the same data reuse one computation.
+
+    `session` (st.session_state) remembers the session's last filter
+    result; a new filter that refines it is evaluated over its rows only.
+    """
+    versions = tuple(t.version for t in (invoices, jobs, customers, estimates))
+    spec = normalize_filters(filters)
+    last = session.get("_last_filter_rows") if session is not None else None
+    previous = last[1:] if last is not None and last[0] == versions else None
+
+    def compute():
+        rows = filter_rows({"invoices": invoices, "jobs": jobs, "customers": customers}, filters, previous)
+        # KPIs + chart datasets from the daily rollups when no search is set
+        summary = dashboard_summary(invoices, jobs, customers, estimates, filters)
+        if summary is None:
+            views = (invoices.take(rows["invoices"]), jobs.take(rows["jobs"]),
+                     customers.take(rows["customers"]), estimates)
+            summary = metrics.get_kpis(*views), chart_datasets(*views)
+        return {"rows": rows, "kpis": summary[0], "charts": summary[1]}
+
+    result = RESULTS.get_or_compute(("dashboard", versions, filter_key(filters)), compute)
+    rows = result["rows"]
+    if session is not None:
+        session["_last_filter_rows"] = (versions, spec, rows)
+    views = (invoices.take(rows["invoices"]), jobs.take(rows["jobs"]), customers.take(rows["customers"]), estimates)
+    return views, result["kpis"], result["charts"]
+
+def result_cache_stats():
+    """Hit ratio and memory use of the shared filter-result cache."""
+    return RESULTS.stats()
 
 def get_unique_options(jobs, customers):
     """Return sorted unique job statuses and lead sources for populating filters."""
-    js = sorted(list({(j.get("work_status") or "Unknown") for j in (jobs or [])}))
-    ls = sorted(list({(c.get("lead_source") or "Unknown") for c in (customers or [])}))
+    js = sorted(set(jobs.labels("work_status").tolist()))
+    ls = sorted(set(customers.labels("lead_source").tolist()))
     return js, ls
 
 def get_charts_data(invoices, jobs, customers, estimates, chart):
-    import pandas as pd
-    if chart == "revenue_by_job":
-        df_jobs = pd.DataFrame(jobs)
-        if not df_jobs.empty and "description" in df_jobs.columns:
-            df_jobs["revenue"] = pd.to_numeric(df_jobs.get("total_amount", 0)).fillna(0)
-            return df_jobs.groupby("description", as_index=False)["revenue"].sum().rename(columns={"description":"job"}).sort_values("revenue", ascending=False)
-        return pd.DataFrame()
-    elif chart == "revenue_by_source":
-        rows = []
-        for job in jobs:
-            rows.append({"source": job.get("customer",{}).get("lead_source") or "Unknown", "revenue": job.get("total_amount") or 0})
-        df = pd.DataFrame(rows)
-        if df.empty: return df
-        return df.groupby("source", as_index=False)["revenue"].sum().sort_values("revenue", ascending=False)
-    elif chart == "revenue_trend":
-        df = pd.DataFrame(invoices)
-        if df.empty or "invoice_date" not in df: return pd.DataFrame()
-        df["invoice_date"] = pd.to_datetime(df["invoice_date"], errors="coerce").dt.tz_localize(None)
-        df["amount"] = pd.to_numeric(df.get("amount", 0)).fillna(0)
-        trend = df.groupby(df["invoice_date"].dt.date)["amount"].sum().reset_index()
-        trend.columns = ["date", "revenue"]
-        return trend.sort_values("date")
-    elif chart == "jobs_status":
-        df = pd.DataFrame(jobs)
-        if df.empty or "work_status" not in df: return pd.DataFrame()
-        out = df["work_status"].fillna("Unknown").value_counts().reset_index()
-        out.columns = ["status", "count"]
-        return out
-    elif chart == "leads_by_source":
-        df = pd.DataFrame(customers)
-        if df.empty: return pd.DataFrame()
-        out = df.get("lead_source", pd.Series(dtype=str)).fillna("Unknown").value_counts().reset_index()
-        out.columns = ["source", "count"]
-        return out
-    elif chart == "leads_trend":
-        df = pd.DataFrame(customers)
-        if df.empty or "created_at" not in df: return pd.DataFrame()
-        df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce").dt.tz_localize(None)
-        out = df.groupby(df["created_at"].dt.date).size().reset_index(name="leads")
-        out.columns = ["date", "leads"]
-        return out.sort_values("date")
-    return pd.DataFrame()
+    """One chart's dataset; prefer chart_datasets() when rendering several."""
+    return chart_datasets(invoices, jobs, customers, estimates, charts=(chart,))[chart]
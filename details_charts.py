@@ -1,10 +1,28 @@
 # graphics/details_charts.py
 from __future__ import annotations
 
+import gzip
+import hashlib
+import io
+import re
+from typing import Any, Dict, Optional
+
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
+from graphics.columnar import Table
+from graphics.flat_frame import flat_column, flat_frame
+from graphics.result_cache import ResultCache
+
+try:                                    # Parquet export is offered when pyarrow is installed
+    import pyarrow  # noqa: F401
+    _HAS_PARQUET = True
+except Exception:
+    _HAS_PARQUET = False
+
 # Theme (with safe fallbacks so a missing token won't crash the page)
 try:
     from graphics.theme import EMERALD, GOLD, WHITE, CARD_BG
@@ -21,17 +39,110 @@ __all__ = ["details_tables", "details_charts"]
 def _to_df(data) -> pd.DataFrame:
     if not data:
         return pd.DataFrame()
+    if isinstance(data, Table):
+        # flattened once per dataset version and shared (graphics.flat_frame); read-only
+        return flat_frame(data)
     try:
         return pd.json_normalize(list(data), sep=".")
     except Exception:
         return pd.DataFrame(list(data))
 
-def _search(df: pd.DataFrame, query: str) -> pd.DataFrame:
+# Lowercased text of every cell of a dataset version's flattened columns, one entry per
+# column (shared by all sessions and views: a view picks its rows)
+_TEXTS = ResultCache(128 << 20)
+
+def _source_key(data) -> Optional[Any]:
+    """Identity of the rows a details table shows: (dataset, version, row ids digest)."""
+    if not isinstance(data, Table):
+        return None
+    rows = hashlib.blake2b(np.ascontiguousarray(data.row_ids()).tobytes(), digest_size=16).hexdigest()
+    return data.name, data.version, rows
+
+def _base_text(table: Table, column: str, numeric: bool) -> pd.Series:
+    """Text of a flattened column over the whole dataset version, as a frame column of that dtype shows it."""
+    def build():
+        values = pd.Series(flat_column(table, column)[0], dtype=object)
+        if numeric:             # ints among NaN or floats are shown (and matched) as floats
+            values = pd.to_numeric(values, errors="coerce").astype(np.float64)
+        return values.astype(str).str.lower()
+    return _TEXTS.get_or_compute((table.name, table.version, column, numeric), build)
+
+def _column_texts(df: pd.DataFrame, table: Optional[Table] = None) -> Dict[str, pd.Series]:
+    """str() of every cell, lowercased, per column; from `table`'s cached texts when `df` is its frame."""
+    if table is None:
+        return {c: df[c].astype(str).str.lower() for c in df.columns}
+    rows = table.row_ids()
+    return {c: pd.Series(_base_text(table, c, df[c].dtype.kind == "f").to_numpy()[rows], index=df.index)
+            for c in df.columns}
+
+def _search(df: pd.DataFrame, query: str, table: Optional[Table] = None) -> pd.DataFrame:
+    """
+    Rows where any cell's text contains `query` (case-insensitive, regex
+    allowed). `table` is the Table `df` was flattened from, if any.
+    """
     if df.empty or not query:
         return df
-    mask = df.apply(lambda r: r.astype(str).str.contains(query, case=False, na=False).any(), axis=1)
+    literal = re.escape(query) == query
+    if not literal:
+        try:
+            re.compile(query)
+        except re.error:        # not a valid pattern: match it as plain text
+            literal = True
+    needle = query.lower() if literal else query
+    mask = np.zeros(len(df), dtype=bool)
+    for text in _column_texts(df, table).values():
+        mask |= text.str.contains(needle, case=literal, regex=not literal, na=False).to_numpy(dtype=bool)
     return df[mask]
 
+# Sort permutations of searched tables, per (table, search, column, order)
+_ORDERS = ResultCache(64 << 20)
+PAGE_SIZES = [25, 50, 100, 250]
+
+def _sort_order(df: pd.DataFrame, column: str, ascending: bool, key: Optional[Any] = None) -> np.ndarray:
+    """Positions of `df`'s rows sorted by `column` (stable, missing values last)."""
+    def build():
+        values = df[column].reset_index(drop=True)
+        try:
+            ordered = values.sort_values(ascending=ascending, kind="stable", na_position="last")
+        except TypeError:       # mixed types (lists, dicts, ...): by their text
+            ordered = values.astype(str).where(values.notna()).sort_values(
+                ascending=ascending, kind="stable", na_position="last")
+        return ordered.index.to_numpy()
+    return build() if key is None else _ORDERS.get_or_compute((key, column, ascending), build)
+
+# Exports, built when a download is requested, per (table, search, format)
+_EXPORTS = ResultCache(256 << 20)
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    **({"Parquet": ("parquet", "application/vnd.apache.parquet")} if _HAS_PARQUET else {}),
+}
+
+def _write_csv(df: pd.DataFrame, out) -> None:
+    # chunk by chunk: never holds the whole table as one string
+    for start in range(0, max(len(df), 1), EXPORT_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS]
+        out.write(chunk.to_csv(index=False, header=start == 0).encode("utf-8"))
+
+def _export(df: pd.DataFrame, fmt: str, key: Optional[Any] = None) -> bytes:
+    """`df` as a file of format `fmt` (an EXPORT_FORMATS key); cached per `key` when given."""
+    def build():
+        buf = io.BytesIO()
+        if fmt == "Parquet":
+            try:
+                df.to_parquet(buf, index=False)
+            except Exception:       # nested lists/dicts of mixed shape: store their text
+                buf = io.BytesIO()
+                df.astype({c: str for c in df.columns if df[c].dtype == object}).to_parquet(buf, index=False)
+        elif fmt == "CSV (gzip)":
+            with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=6) as gz:
+                _write_csv(df, gz)
+        else:
+            _write_csv(df, buf)
+        return buf.getvalue()
+    return build() if key is None else _EXPORTS.get_or_compute((key, fmt), build)
+
 def _naive(series: pd.Series) -> pd.Series:
     """Make any timestamp-like series tz-naive to avoid tz-aware/naive errors."""
     ts = pd.to_datetime(series, errors="coerce", utc=True)
@@ -65,6 +176,8 @@ def details_tables(invoices=None, jobs=None, customers=None, estimates=None) ->
     dfj = _to_df(jobs)
     dfc = _to_df(customers)
     dfe = _to_df(estimates)
+    datasets = {"invoices": invoices, "jobs": jobs, "customers": customers, "estimates": estimates}
+    sources = {name: _source_key(data) for name, data in datasets.items()}
 
     # -----------------------------
     # Row: Invoice charts
@@ -201,16 +314,60 @@ def details_tables(invoices=None, jobs=None, customers=None, estimates=None) ->
             st.info(f"No {name.lower()} to show.")
             return
         q = st.text_input(f"Search {name}", key=f"search_{key_suffix}")
-        view = _search(df, q)
-        st.dataframe(view, hide_index=True, use_container_width=True)
-        st.download_button(
-            f"Download {name} CSV",
-            data=view.to_csv(index=False).encode("utf-8"),
-            file_name=f"{name.lower()}_details.csv",
-            mime="text/csv",
-            use_container_width=True,
-            key=f"dl_{key_suffix}",
-        )
+        view = _search(df, q, datasets[key_suffix] if isinstance(datasets[key_suffix], Table) else None)
+
+        # Only the visible page is sent to the browser; sorting uses cached permutations
+        s1, s2, s3, s4 = st.columns([3, 2, 2, 2], gap="small")
+        with s1:
+            sort_col = st.selectbox("Sort by", ["(none)"] + list(view.columns), key=f"sort_{key_suffix}")
+        with s2:
+            order = st.selectbox("Order", ["Ascending", "Descending"], key=f"order_{key_suffix}")
+        with s3:
+            size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"size_{key_suffix}")
+        pages = max(1, -(-len(view) // size))
+        page_key = f"page_{key_suffix}"
+        if st.session_state.get(page_key, 1) > pages:
+            st.session_state[page_key] = 1
+        with s4:
+            page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=page_key)
+
+        start = (int(page) - 1) * size
+        if sort_col == "(none)" or view.empty:
+            shown = view.iloc[start:start + size]
+        else:
+            source = None if sources[key_suffix] is None else (sources[key_suffix], q)
+            perm = _sort_order(view, sort_col, order == "Ascending", source)
+            shown = view.iloc[perm[start:start + size]]
+        st.dataframe(shown, hide_index=True, use_container_width=True)
+        st.caption(f"Rows {start + 1:,}–{min(start + size, len(view)):,} of {len(view):,}" if len(view)
+                   else "No matching rows.")
+        # The file is only built when the button is clicked (and then cached)
+        d1, d2 = st.columns([1, 3], gap="small")
+        with d1:
+            fmt = st.selectbox("Format", list(EXPORT_FORMATS), key=f"fmt_{key_suffix}", label_visibility="collapsed")
+        ext, mime = EXPORT_FORMATS[fmt]
+        export_key = None if sources[key_suffix] is None else (sources[key_suffix], q)
+        build = lambda: _export(view, fmt, export_key)
+        with d2:
+            try:
+                st.download_button(
+                    f"Download {name} {fmt}",
+                    data=build,
+                    file_name=f"{name.lower()}_details.{ext}",
+                    mime=mime,
+                    use_container_width=True,
+                    key=f"dl_{key_suffix}",
+                )
+            except StreamlitAPIException:   # Streamlit without deferred downloads: build on request
+                if st.button(f"Prepare {name} {fmt}", key=f"prep_{key_suffix}", use_container_width=True):
+                    st.download_button(
+                        f"Download {name} {fmt}",
+                        data=build(),
+                        file_name=f"{name.lower()}_details.{ext}",
+                        mime=mime,
+                        use_container_width=True,
+                        key=f"dl_{key_suffix}",
+                    )
 
     with tabs[0]:
         _table(dfi, "Invoices", "invoices")
@@ -0,0 +1,72 @@
+# graphics/figure_cache.py
+"""
+Plotly figures cached by the content of their input.
+
+Chart functions rebuilt their figure on every rerun even when the frame
+behind it hadn't changed. `cached_figure` keys a figure by the chart name,
+a content hash of its input (a DataFrame, or any plain value) and its
+styling arguments:
+
+    fig = cached_figure("jobs_by_status", df, _jobs_status_figure)
+    st.plotly_chart(fig, use_container_width=True)
+
+Entries live in a byte-bounded LRU (graphics.result_cache) shared by all
+sessions, sized by their input plus a fixed allowance for layout and
+template; build counts and times are kept per chart (`figure_stats`).
+Cached figures are shared: callers must not mutate them.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict
+
+import pandas as pd
+
+from graphics.result_cache import ResultCache, nbytes
+
+__all__ = ["FIGURE_CACHE_BYTES", "FIGURES", "content_hash", "cached_figure", "figure_stats"]
+
+FIGURE_CACHE_BYTES = 64 << 20
+FIGURE_BASE_BYTES = 32 << 10        # layout, template and trace objects on top of the data
+
+FIGURES = ResultCache(FIGURE_CACHE_BYTES)
+_STATS: Dict[str, Dict[str, float]] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def content_hash(value: Any) -> str:
+    """Digest of a chart input: a frame's columns, dtypes, index and values, or a value's repr."""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(value, pd.DataFrame):
+        h.update(repr([(str(c), str(t)) for c, t in value.dtypes.items()]).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    else:
+        h.update(repr(value).encode())
+    return h.hexdigest()
+
+
+def cached_figure(name: str, data: Any, build: Callable[..., Any], **style) -> Any:
+    """`build(data, **style)`, reused while `data` and `style` are unchanged."""
+    key = (name, content_hash(data), tuple(sorted(style.items())))
+    fig = FIGURES.get(key)
+    with _STATS_LOCK:
+        stats = _STATS.setdefault(name, {"builds": 0, "hits": 0, "build_ms": 0.0})
+        if fig is not None:
+            stats["hits"] += 1
+    if fig is not None:
+        return fig
+    started = time.perf_counter()
+    fig = build(data, **style)
+    elapsed = (time.perf_counter() - started) * 1000
+    FIGURES.put(key, fig, size=nbytes(data) + FIGURE_BASE_BYTES)
+    with _STATS_LOCK:
+        stats.update(builds=stats["builds"] + 1, build_ms=elapsed)
+    return fig
+
+
+def figure_stats() -> Dict[str, Dict[str, float]]:
+    """Per chart: figures built, cache hits and last build time (ms)."""
+    with _STATS_LOCK:
+        return {name: dict(s) for name, s in _STATS.items()}
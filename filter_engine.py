@@ -0,0 +1,178 @@
+# graphics/filter_engine.py
+"""
+Filter engine behind data_loader.apply_filters.
+
+The sidebar filters are normalised once, then evaluated per dataset:
+
+  • the date range is binary-searched in a permutation of the rows sorted
+    by time (built once per version), giving a contiguous slice
+  • label sets and the search index (graphics.search_index) are then
+    evaluated on that slice only
+
+The result is an array of row ids per dataset; callers turn it into a view
+with `Table.take`, so no records are copied.
+
+Typing into the search box or narrowing the sidebar mostly refines the
+previous filter (a longer search, a sub-range of dates, fewer labels).
+Given the previous spec and rows, `filter_rows` then evaluates the new
+filter over those rows only, instead of the whole dataset.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from graphics.columnar import NAT, Table
+from graphics.search_index import search_rows
+
+__all__ = ["FILTERED", "normalize_filters", "filter_key", "refines", "time_order", "dataset_rows", "filter_rows"]
+
+# Which sidebar multiselect narrows which dataset, and on which label field.
+# Datasets not listed here (estimates) are never filtered.
+FILTERED: Dict[str, Dict[str, str]] = {
+    "invoices": {},
+    "jobs": {"job_statuses": "work_status"},
+    "customers": {"lead_sources": "lead_source"},
+}
+
+
+def _to_naive(ts):
+    """Convert to pandas Timestamp (tz-naive). Returns pd.NaT on failure."""
+    try:
+        t = pd.to_datetime(ts, errors="coerce")
+        if pd.isna(t):
+            return pd.NaT
+        # If a DatetimeIndex/Timestamp with tz, strip it
+        try:
+            return t.tz_localize(None)
+        except Exception:
+            # Already tz-naive
+            return t
+    except Exception:
+        return pd.NaT
+
+
+def normalize_filters(filters: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Sidebar values -> comparable, hashable filter spec."""
+    filters = filters or {}
+    return {
+        "date_from": _to_naive(filters.get("date_from")) if filters else None,
+        "date_to": _to_naive(filters.get("date_to")) if filters else None,
+        "search": (filters.get("search") or "").strip().lower(),
+        "lead_sources": frozenset(filters.get("lead_sources") or []),
+        "job_statuses": frozenset(filters.get("job_statuses") or []),
+    }
+
+
+def filter_key(filters: Optional[Mapping[str, Any]]) -> Tuple:
+    """Hashable fingerprint of the sidebar values: equal for filters selecting the same rows."""
+    spec = normalize_filters(filters)
+    return tuple(spec[k] for k in ("date_from", "date_to", "search", "lead_sources", "job_statuses"))
+
+
+def refines(spec: Mapping[str, Any], previous: Mapping[str, Any], name: Optional[str] = None) -> bool:
+    """
+    True when every row passing `spec` also passes `previous` (both
+    normalised), considering only the filters of dataset `name` if given.
+    """
+    for key, narrower in (("date_from", lambda new, old: new >= old), ("date_to", lambda new, old: new <= old)):
+        new, old = spec[key], previous[key]
+        if old is None:
+            continue
+        if new is None or pd.isna(new) or pd.isna(old) or not narrower(new, old):
+            return False
+    if previous["search"] not in spec["search"]:
+        return False
+    keys = FILTERED[name] if name is not None else ("lead_sources", "job_statuses")
+    return all(not previous[k] or (spec[k] and spec[k] <= previous[k]) for k in keys)
+
+
+# ---------- time index ----------
+def time_order(table: Table):
+    """(row order, times in that order) of the rows with a timestamp, sorted by time."""
+    def _build(base: Table):
+        times = base.times()
+        order = np.argsort(times, kind="stable")
+        # NAT sorts first and never falls in a range
+        order = order[np.searchsorted(times[order], NAT, side="right"):]
+        return order, times[order]
+    return table.cached("time_order", _build)
+
+
+# ---------- predicates ----------
+def _range_mask(times: np.ndarray, date_from, date_to) -> np.ndarray:
+    mask = times != NAT
+    for bound, keep in ((date_from, np.greater_equal), (date_to, np.less_equal)):
+        if bound is None:
+            continue
+        if pd.isna(bound):
+            return np.zeros(len(times), dtype=bool)
+        mask &= keep(times, bound.value)
+    return mask
+
+def _range_rows(table: Table, date_from, date_to) -> np.ndarray:
+    """Sorted rows of `table` within the range."""
+    if table.rows is not None:
+        return np.flatnonzero(_range_mask(table.times(), date_from, date_to))
+    if any(b is not None and pd.isna(b) for b in (date_from, date_to)):
+        return np.empty(0, dtype=np.intp)
+    order, times = time_order(table)
+    lo = np.searchsorted(times, date_from.value, side="left") if date_from is not None else 0
+    hi = np.searchsorted(times, date_to.value, side="right") if date_to is not None else len(times)
+    return np.sort(order[lo:hi]) if lo < hi else np.empty(0, dtype=np.intp)
+
+def _label_mask(table: Table, field: str, allowed) -> np.ndarray:
+    # decided once per distinct label, then broadcast to rows
+    return table.map_labels(field, lambda c: (c or "Unknown") in allowed, "Unknown" in allowed, dtype=bool)
+
+def _search_hits(table: Table, search: str, rows: np.ndarray) -> np.ndarray:
+    base_rows = table.row_ids()[rows]
+    return rows[np.isin(base_rows, search_rows(table, search, base_rows))]
+
+
+# ---------- engine ----------
+def dataset_rows(table: Table, spec: Dict[str, Any], within: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Rows of `table` passing every filter that applies to it, cheapest filter first.
+
+    `within` (sorted rows of an earlier result this spec refines) limits
+    the evaluation to those rows.
+    """
+    if within is not None:
+        rows = within
+        if len(rows) and (spec["date_from"] is not None or spec["date_to"] is not None):
+            rows = rows[_range_mask(table.times()[rows], spec["date_from"], spec["date_to"])]
+    elif spec["date_from"] is not None or spec["date_to"] is not None:
+        rows = _range_rows(table, spec["date_from"], spec["date_to"])
+    else:
+        rows = np.arange(len(table))
+    for key, field in FILTERED.get(table.name, {}).items():
+        if spec[key] and len(rows):
+            rows = rows[_label_mask(table.take(rows), field, spec[key])]
+    if spec["search"] and len(rows):
+        rows = _search_hits(table, spec["search"], rows)
+    return rows
+
+
+def filter_rows(tables: Mapping[str, Table], filters: Optional[Mapping[str, Any]],
+                previous: Optional[Tuple[Mapping[str, Any], Mapping[str, np.ndarray]]] = None
+                ) -> Dict[str, np.ndarray]:
+    """
+    Row ids (into each given table) passing the sidebar filters.
+
+    `previous` is (normalised spec, rows) of an earlier call over the same
+    tables; datasets whose filters the new ones refine start from its rows.
+    """
+    spec = normalize_filters(filters)
+    rows = {}
+    for name, table in tables.items():
+        if name not in FILTERED or not len(table):
+            rows[name] = np.arange(len(table))
+            continue
+        within = None
+        if previous is not None and name in previous[1] and refines(spec, previous[0], name):
+            within = previous[1][name]
+        rows[name] = dataset_rows(table, spec, within)
+    return rows
@@ -1,69 +1,86 @@
 import streamlit as st
 import plotly.express as px
 from graphics.data_loader import get_charts_data
+from graphics.figure_cache import cached_figure
 from graphics.theme import EMERALD, GOLD, WHITE, CARD_BG
 
+# --- Figures (built once per input frame, see graphics.figure_cache) ---
+def _revenue_bar_figure(df):
+    fig = px.bar(
+        df, x="job", y="revenue", text_auto=".2s",
+        color_discrete_sequence=[EMERALD], template="plotly_dark"
+    )
+    fig.update_traces(marker_line_color=GOLD, marker_line_width=1)
+    fig.update_xaxes(tickangle=-20)
+    fig.update_layout(
+        height=190, margin=dict(l=0, r=0, t=0, b=0),
+        paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG,
+        font=dict(color=WHITE), showlegend=False
+    )
+    return fig
+
+def _revenue_donut_figure(df):
+    fig = px.pie(
+        df, names="source", values="revenue",
+        color_discrete_sequence=[EMERALD, GOLD, WHITE], template="plotly_dark",
+        hole=0.45
+    )
+    fig.update_traces(textposition="inside", textinfo="percent+label")
+    fig.update_layout(
+        height=190, margin=dict(l=0, r=0, t=0, b=0),
+        paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG,
+        font=dict(color=WHITE), showlegend=False
+    )
+    return fig
+
+def _revenue_line_figure(df):
+    fig = px.line(
+        df, x="date", y="revenue", markers=True,
+        color_discrete_sequence=[GOLD], template="plotly_dark"
+    )
+    fig.update_traces(line=dict(width=2), marker=dict(size=6, color=EMERALD))
+    fig.update_layout(
+        height=190, margin=dict(l=0, r=0, t=0, b=0),
+        paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG,
+        font=dict(color=WHITE)
+    )
+    return fig
+
+
 # --- Job Revenue (Top 10) ---
-def revenue_bar_top10(invoices, jobs, customers, estimates):
+def revenue_bar_top10(invoices, jobs, customers, estimates, charts=None):
     st.markdown("<div class='card'><div class='card-header'>💼 Job Revenue (Top 10)</div>", unsafe_allow_html=True)
-    df = get_charts_data(invoices, jobs, customers, estimates, chart="revenue_by_job")
+    df = (charts["revenue_by_job"] if charts is not None
+          else get_charts_data(invoices, jobs, customers, estimates, chart="revenue_by_job"))
     if df.empty:
         st.info("No job revenue data available.")
     else:
-        df = df.head(10)
-        fig = px.bar(
-            df, x="job", y="revenue", text_auto=".2s",
-            color_discrete_sequence=[EMERALD], template="plotly_dark"
-        )
-        fig.update_traces(marker_line_color=GOLD, marker_line_width=1)
-        fig.update_xaxes(tickangle=-20)
-        fig.update_layout(
-            height=190, margin=dict(l=0, r=0, t=0, b=0),
-            paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG,
-            font=dict(color=WHITE), showlegend=False
-        )
+        fig = cached_figure("revenue_bar_top10", df.head(10), _revenue_bar_figure)
         st.plotly_chart(fig, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
 
 # --- Revenue by Source (Donut) ---
-def revenue_by_source_donut(invoices, jobs, customers, estimates):
+def revenue_by_source_donut(invoices, jobs, customers, estimates, charts=None):
     st.markdown("<div class='card'><div class='card-header'>🧭 Revenue by Source</div>", unsafe_allow_html=True)
-    df = get_charts_data(invoices, jobs, customers, estimates, chart="revenue_by_source")
+    df = (charts["revenue_by_source"] if charts is not None
+          else get_charts_data(invoices, jobs, customers, estimates, chart="revenue_by_source"))
     if df.empty:
         st.info("No revenue by source data available.")
     else:
-        fig = px.pie(
-            df, names="source", values="revenue",
-            color_discrete_sequence=[EMERALD, GOLD, WHITE], template="plotly_dark",
-            hole=0.45
-        )
-        fig.update_traces(textposition="inside", textinfo="percent+label")
-        fig.update_layout(
-            height=190, margin=dict(l=0, r=0, t=0, b=0),
-            paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG,
-            font=dict(color=WHITE), showlegend=False
-        )
+        fig = cached_figure("revenue_by_source_donut", df, _revenue_donut_figure)
         st.plotly_chart(fig, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
 
 # --- Revenue Trend (Sparkline Line Chart) ---
-def revenue_sparkline(invoices, jobs, customers, estimates, title="📈 Revenue Trend"):
+def revenue_sparkline(invoices, jobs, customers, estimates, title="📈 Revenue Trend", charts=None):
     st.markdown(f"<div class='card'><div class='card-header'>{title}</div>", unsafe_allow_html=True)
-    df = get_charts_data(invoices, jobs, customers, estimates, chart="revenue_trend")
+    df = (charts["revenue_trend"] if charts is not None
+          else get_charts_data(invoices, jobs, customers, estimates, chart="revenue_trend"))
     if df.empty:
         st.info("No revenue trend data available.")
     else:
-        fig = px.line(
-            df, x="date", y="revenue", markers=True,
-            color_discrete_sequence=[GOLD], template="plotly_dark"
-        )
-        fig.update_traces(line=dict(width=2), marker=dict(size=6, color=EMERALD))
-        fig.update_layout(
-            height=190, margin=dict(l=0, r=0, t=0, b=0),
-            paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG,
-            font=dict(color=WHITE)
-        )
+        fig = cached_figure("revenue_sparkline", df, _revenue_line_figure)
         st.plotly_chart(fig, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,312 @@
+# graphics/flat_frame.py
+"""
+Flattened frames of the raw records, shared by every page.
+
+Pages used to run pd.json_normalize over the same record lists on each
+rerun (details tables, data info). Here the flattening is done per dataset
+version instead, and only for the columns a caller asks for:
+
+  • the schema is inferred once from the records: the distinct record
+    layouts, their flattened column names, and each row's layout
+  • each column is plucked from the records on first use and kept
+  • both are kept in the column store (graphics.snapshot), so after a
+    restart the frames are assembled without parsing the records
+  • `flat_frame(table, columns)` assembles a frame from kept columns,
+    restricted to the table's rows
+
+Frames hold the same columns, in the same order, values and dtypes as
+pd.json_normalize(records, sep=".") over the same rows, with a fresh
+RangeIndex. The column order of a view comes from the layouts of its own
+rows, first seen first. One deviation: a frame without columns has an
+empty object column index, where json_normalize([]) gives a RangeIndex.
+The unprojected frame of a whole dataset is shared: callers must not
+mutate it. Other frames are their own.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from graphics.columnar import Table, register_chunked, register_extender
+from graphics.snapshot import register_stored
+
+__all__ = ["flat_schema", "flat_column", "flat_frame"]
+
+
+def _walk(obj: Dict[str, Any], prefix: str, out: List[str]) -> None:
+    for k, v in obj.items():
+        if isinstance(v, dict):
+            _walk(v, prefix + str(k) + ".", out)
+        else:
+            out.append(prefix + str(k))
+
+def _paths(rec: Dict[str, Any]) -> List[str]:
+    """
+    Flattened keys of one record in json_normalize's order: top-level
+    scalar keys first, then the nested objects, depth-first in key order.
+    """
+    flat = [str(k) for k, v in rec.items() if not isinstance(v, dict)]
+    for k, v in rec.items():
+        if isinstance(v, dict):
+            _walk(v, str(k) + ".", flat)
+    return flat
+
+def _layout(rec: Dict[str, Any]) -> tuple:
+    """Hashable shape of a record: its keys, with nested objects' shapes."""
+    return tuple((k, _layout(v)) if isinstance(v, dict) else k for k, v in rec.items())
+
+class _Schema:
+    """Record layouts of a dataset version: each row's layout id, each layout's paths."""
+
+    def __init__(self, row_layout: np.ndarray, ids: Dict[tuple, int], paths: List[Tuple[str, ...]],
+                 columns: List[str]):
+        self.row_layout = row_layout        # layout id per base row
+        self.ids = ids                      # layout -> id
+        self.paths = paths                  # id -> flattened paths, json_normalize order
+        self.columns = columns              # paths of every row, first seen first
+
+    @classmethod
+    def build(cls, records: List[Any], head: Optional["_Schema"] = None) -> "_Schema":
+        """Schema of `records`; with `head`, of head's rows followed by them."""
+        ids = dict(head.ids) if head is not None else {}
+        paths = list(head.paths) if head is not None else []
+        seen = dict.fromkeys(head.columns) if head is not None else {}
+        row_layout = np.empty(len(records), dtype=np.int32)
+        for i, rec in enumerate(records):
+            layout = _layout(rec) if isinstance(rec, dict) else ()
+            found = ids.get(layout)
+            if found is None:               # most records share a handful of layouts
+                found = ids[layout] = len(paths)
+                paths.append(tuple(_paths(rec)) if isinstance(rec, dict) else ())
+                for path in paths[found]:
+                    seen.setdefault(path)
+            row_layout[i] = found
+        if head is not None:
+            row_layout = np.concatenate((head.row_layout, row_layout))
+        return cls(row_layout, ids, paths, list(seen))
+
+    def columns_of(self, rows: Optional[np.ndarray]) -> List[str]:
+        """Paths of the given base rows (all rows for None), in json_normalize order."""
+        if rows is None:
+            return self.columns
+        used, first = np.unique(self.row_layout[rows], return_index=True)
+        seen: Dict[str, None] = {}
+        for layout in used[np.argsort(first)]:
+            for path in self.paths[layout]:
+                seen.setdefault(path)
+        return list(seen)
+
+_MISSING = object()
+
+def _pluck(rec: Any, parts: List[str]) -> Any:
+    """Value at a flattened path; _MISSING when absent or when it is itself an object."""
+    if not isinstance(rec, dict):
+        return _MISSING
+    for i in range(len(parts), 0, -1):          # keys may themselves contain dots
+        key = ".".join(parts[:i])
+        if key in rec:
+            value = rec[key]
+            if i == len(parts):
+                return _MISSING if isinstance(value, dict) else value
+            if isinstance(value, dict):
+                return _pluck(value, parts[i:])
+    return _MISSING
+
+def _objects(values: List[Any]) -> np.ndarray:
+    return np.fromiter(values, dtype=object, count=len(values))
+
+def _column(records: List[Any], path: str):
+    """(values, present) of a flattened path: raw values (NaN where absent) and key presence."""
+    parts = path.split(".")
+    values = np.empty(len(records), dtype=object)
+    if len(parts) == 1:
+        values[:] = [r.get(path, _MISSING) if isinstance(r, dict) else _MISSING for r in records]
+        values[[isinstance(v, dict) for v in values]] = _MISSING
+    else:
+        values[:] = [_pluck(r, parts) for r in records]
+    present = np.fromiter((v is not _MISSING for v in values), dtype=bool, count=len(values))
+    values[~present] = np.nan
+    return values, present
+
+
+class _Columns:
+    """Lazily plucked (or read from the column store) columns of one dataset version."""
+
+    def __init__(self, table: Table, columns: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None,
+                 stored=None):
+        self.table = table
+        self.columns = columns or {}         # path -> (values, present)
+        self.stored = stored                 # snapshot parts: "paths", then "values.i" / "has.i" per path
+        self._stored_paths = {p: i for i, p in enumerate(stored["paths"])} if stored is not None else {}
+        self._lock = threading.Lock()
+
+    def paths(self) -> List[str]:
+        """Paths held, plucked or stored."""
+        with self._lock:
+            return list(dict.fromkeys([*self.columns, *self._stored_paths]))
+
+    def get(self, path: str):
+        with self._lock:
+            if path not in self.columns:
+                self.columns[path] = self._read(path) or _column(self.table.records, path)
+            return self.columns[path]
+
+    def _read(self, path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        i = self._stored_paths.get(path)
+        if i is None:
+            return None
+        try:
+            values = _objects(self.stored[f"values.{i}"])
+            present = np.array(self.stored[f"has.{i}"], dtype=bool)
+        except (OSError, ValueError):        # store replaced since: pluck from the records
+            return None
+        values[~present] = np.nan
+        return values, present
+
+
+def _schema(table: Table) -> _Schema:
+    return table.cached("flat_schema", lambda base: _Schema.build(base.records))
+
+
+def flat_schema(table: Table) -> List[str]:
+    """Flattened column names of `table`'s rows, in pd.json_normalize order."""
+    return _schema(table).columns_of(table.rows)
+
+
+def _columns(table: Table) -> _Columns:
+    return table.cached("flat_columns", lambda base: _Columns(base))
+
+
+def flat_column(table: Table, path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(raw values, key present) of one flattened column over the whole dataset version."""
+    return _columns(table).get(path)
+
+
+def flat_frame(table: Table, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    The rows of `table`, flattened. `columns` projects onto those of the
+    schema (in the order given); None means all of them. As with
+    json_normalize on those rows, columns none of them has are left out
+    and dtypes are inferred from their values.
+    """
+    if columns is None:
+        if table.rows is None:
+            return table.cached("flat_frame", lambda base: _assemble(base, flat_schema(base), None))
+        columns = flat_schema(table)
+    else:
+        present = set(_schema(table).columns)
+        columns = [c for c in columns if c in present]
+    return _assemble(table.base, columns, table.rows)
+
+
+def _assemble(base: Table, columns: List[str], rows: Optional[np.ndarray]) -> pd.DataFrame:
+    data = {}
+    for path in columns:
+        values, present = flat_column(base, path)
+        if rows is not None:
+            values, present = values[rows], present[rows]
+        if present.any():
+            data[path] = values
+    n = len(base) if rows is None else len(rows)
+    if not data:
+        return pd.DataFrame(index=pd.RangeIndex(n), columns=pd.Index([], dtype=object))
+    return pd.DataFrame(data, index=pd.RangeIndex(n)).infer_objects()
+
+
+# appended rows (incremental reload): new paths go last, kept columns grow
+def _extend_columns(old: "_Columns", table: Table, records: List[Any]) -> "_Columns":
+    grown = {}
+    for path in old.paths():
+        values, present = old.get(path)
+        new_values, new_present = _column(records, path)
+        grown[path] = (np.concatenate((values, new_values)), np.concatenate((present, new_present)))
+    return _Columns(table, grown)
+
+register_extender("flat_schema", lambda old, table, start, records: _Schema.build(records, old))
+register_extender("flat_columns", lambda old, table, start, records: _extend_columns(old, table, records))
+
+
+# built while a TableBuilder streams the records (after "flat_schema"): every path, parts per chunk
+def _walk_values(obj: Dict[str, Any], out: List[Any]) -> None:
+    for v in obj.values():
+        if isinstance(v, dict):
+            _walk_values(v, out)
+        else:
+            out.append(v)
+
+def _values(rec: Dict[str, Any]) -> List[Any]:
+    """Values of a record at its _paths(), in the same order."""
+    flat = [v for v in rec.values() if not isinstance(v, dict)]
+    for v in rec.values():
+        if isinstance(v, dict):
+            _walk_values(v, flat)
+    return flat
+
+def _dotted(layout: tuple) -> bool:
+    return any(_dotted(k[1]) or "." in str(k[0]) if isinstance(k, tuple) else "." in str(k) for k in layout)
+
+def _chunk_columns(parts: Optional[Dict[str, tuple]], start: int, records: List[Any],
+                   partials: Dict[Any, Any]) -> Dict[str, tuple]:
+    parts = parts if parts is not None else {}
+    schema = partials["flat_schema"]
+    n = len(records)
+    columns: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    layouts = schema.row_layout[start:start + n]
+    for lid in np.unique(layouts).tolist():
+        rows = np.flatnonzero(layouts == lid)
+        paths = schema.paths[lid]
+        if not paths:
+            continue
+        layout_rows = [records[i] for i in rows.tolist()]
+        if len(set(paths)) < len(paths) or any(_dotted(k) for k, i in schema.ids.items() if i == lid):
+            found = [_column(layout_rows, path) for path in paths]     # keys with dots: resolved like _pluck
+        else:
+            by_path = zip(*map(_values, layout_rows))                   # one walk per record
+            found = [(np.fromiter(v, dtype=object, count=len(rows)), True) for v in by_path]
+        for path, (values, present) in zip(paths, found):
+            if path not in columns:
+                columns[path] = (np.full(n, np.nan, dtype=object), np.zeros(n, dtype=bool))
+            columns[path][0][rows] = values
+            columns[path][1][rows] = present
+    for path in schema.columns:
+        if path not in parts:               # first seen in this chunk: absent from the rows before
+            parts[path] = ([np.full(start, np.nan, dtype=object)], [np.zeros(start, dtype=bool)])
+        values, present = columns.get(path) or (np.full(n, np.nan, dtype=object), np.zeros(n, dtype=bool))
+        parts[path][0].append(values)
+        parts[path][1].append(present)
+    return parts
+
+def _finish_columns(parts: Dict[str, tuple], table: Table) -> _Columns:
+    return _Columns(table, {path: (np.concatenate(values), np.concatenate(present))
+                            for path, (values, present) in parts.items()})
+
+register_chunked("flat_schema", lambda old, start, records, partials: _Schema.build(records, old))
+register_chunked("flat_columns", _chunk_columns, _finish_columns)
+
+
+# kept in the column store (graphics.snapshot); JSON lists for paths and layouts
+def _tuples(layout: list) -> tuple:
+    return tuple((k[0], _tuples(k[1])) if isinstance(k, list) else k for k in layout)
+
+def _dump_schema(schema: _Schema) -> Dict[str, Any]:
+    layouts = sorted(schema.ids, key=schema.ids.get)
+    return {"row_layout": schema.row_layout, "layouts": layouts,
+            "paths": [list(p) for p in schema.paths], "columns": schema.columns}
+
+def _load_schema(table: Table, parts) -> _Schema:
+    ids = {_tuples(layout): i for i, layout in enumerate(parts["layouts"])}
+    return _Schema(parts["row_layout"], ids, [tuple(p) for p in parts["paths"]], parts["columns"])
+
+def _dump_columns(columns: _Columns) -> Dict[str, Any]:
+    paths = columns.paths()
+    out: Dict[str, Any] = {"paths": paths}
+    for i, (values, present) in enumerate(map(columns.get, paths)):
+        out[f"values.{i}"] = np.where(present, values, None).tolist()
+        out[f"has.{i}"] = np.asarray(present, dtype=bool)
+    return out
+
+register_stored("flat_schema", _dump_schema, _load_schema)
+register_stored("flat_columns", _dump_columns, lambda table, parts: _Columns(table, stored=parts))
@@ -1,30 +1,52 @@
+import json
+from functools import lru_cache
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+from graphics.columnar import Table, build_table
+from graphics.geo_index import geo_counts
 from graphics.theme import CARD_BG, EMERALD, GOLD, WHITE
 
-def geo_map(data):
-    rows = []
-    for rec in data:
-        if "addresses" in rec:
-            for addr in rec.get("addresses", []):
-                country = (addr.get("country") or "").upper()
-                if country in ["US", "USA", "UNITED STATES", "UNITED STATES OF AMERICA", "U.S."]:
-                    rows.append("United States")
+# Globe rotation: one frame per ROTATION_STEP degrees of longitude, each
+# carrying only that longitude (the base layout holds the rest). Same spin
+# speed as the old 2-degree / 120 ms frames with half as many frames.
+ROTATION_STEP = 4
+ROTATION_FRAME_MS = 60 * ROTATION_STEP
+
+
+# Optional GeoJSON of ZIP3 areas (feature property "ZIP3"); Plotly ships no
+# ZIP geometry, so without it ZIP3 counts are shown as a ranked bar chart.
+ZIP3_GEOJSON = None
+ZIP3_BARS = 20
+
+
+@lru_cache(maxsize=1)
+def _zip3_shapes():
+    if not ZIP3_GEOJSON:
+        return None
+    try:
+        with open(ZIP3_GEOJSON, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-    if not rows:
-        st.info("No US data available.")
-        return
 
-    df = pd.Series(rows).value_counts().reset_index()
-    df.columns = ["Country", "Count"]
+@lru_cache(maxsize=32)
+def globe_figure(counts, level="country"):
+    """The globe for aggregated `counts`, built once per distinct (counts, level) and reused across reruns."""
+    df = pd.DataFrame(list(counts), columns=["Location", "Count"])
+    if level == "zip3":
+        where = dict(geojson=_zip3_shapes(), featureidkey="properties.ZIP3")
+    else:
+        where = dict(locationmode="USA-states" if level == "state" else "country names")
 
     # Base globe (transparent background)
     fig = go.Figure(
         data=go.Choropleth(
-            locations=df["Country"],
+            locations=df["Location"],
             z=df["Count"],
-            locationmode="country names",
+            **where,
             colorscale=[[0, EMERALD], [0.5, GOLD], [1, WHITE]],
             marker_line_color="gray",
             colorbar_title="Count",
@@ -37,15 +59,11 @@ def geo_map(data):
         )
     )
 
-    # Rotation frames (auto-rotation)
-    frames = []
-    for lon in range(-180, 181, 2):
-        frames.append(go.Frame(
-            layout=dict(
-                geo=dict(projection_rotation=dict(lon=lon, lat=30, roll=0))
-            )
-        ))
-    fig.frames = frames
+    # Rotation frames (auto-rotation): longitude only
+    fig.frames = [
+        dict(layout=dict(geo=dict(projection=dict(rotation=dict(lon=lon)))))
+        for lon in range(-180, 181, ROTATION_STEP)
+    ]
 
     # Layout → transparent globe with rotation
     fig.update_layout(
@@ -72,7 +90,7 @@ def geo_map(data):
                     "label": "",
                     "method": "animate",
                     "args": [None, {
-                        "frame": {"duration": 120, "redraw": True},
+                        "frame": {"duration": ROTATION_FRAME_MS, "redraw": True},
                         "fromcurrent": True,
                         "mode": "immediate",
                         "transition": {"duration": 0},
@@ -82,6 +100,38 @@ def geo_map(data):
             ]
         }]
     )
+    return fig
+
+
+@lru_cache(maxsize=32)
+def zip3_bars(counts):
+    """Top ZIP3 prefixes as a bar chart (when no ZIP3 shapes are configured)."""
+    df = pd.DataFrame(list(counts[:ZIP3_BARS]), columns=["ZIP3", "Count"])
+    fig = go.Figure(go.Bar(x=df["Count"], y=df["ZIP3"], orientation="h", marker_color=EMERALD))
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=0, r=0, t=0, b=0),
+        height=500,
+        yaxis=dict(autorange="reversed", type="category", title="ZIP3"),
+        xaxis=dict(title="Count"),
+    )
+    return fig
+
+
+def geo_map(data, level="country"):
+    if not isinstance(data, Table):
+        data = build_table("", data)
+    counts = geo_counts(data, level)
+    if not counts:
+        st.info("No US data available.")
+        return
+
+    if level == "zip3" and _zip3_shapes() is None:
+        st.plotly_chart(zip3_bars(counts), use_container_width=True)
+        return
+
+    fig = globe_figure(counts, level)
 
     # CSS Glow + Pulse (aligned to globe)
     st.markdown(
@@ -137,22 +187,32 @@ def geo_map(data):
     st.plotly_chart(fig, use_container_width=True)
 
 
+GEO_LEVELS = {"Country": "country", "State": "state", "ZIP3": "zip3"}
+
 def geo_section(invoices, jobs, customers, leads):
     st.markdown("<div class='card'><div class='card-header'>🌍 Interactive Globe View</div>", unsafe_allow_html=True)
 
-    option = st.selectbox(
-        "Select dataset",
-        ["Customers", "Jobs", "Leads", "Invoices"],
-        index=0
-    )
+    c1, c2 = st.columns(2, gap="small")
+    with c1:
+        option = st.selectbox(
+            "Select dataset",
+            ["Customers", "Jobs", "Leads", "Invoices"],
+            index=0
+        )
+    with c2:
+        level = st.selectbox("Level", list(GEO_LEVELS), index=0)
 
     if option == "Customers":
-        geo_map(customers)
+        geo_map(customers, GEO_LEVELS[level])
     elif option == "Jobs":
-        geo_map(jobs)
+        geo_map(jobs, GEO_LEVELS[level])
     elif option == "Leads":
-        geo_map(leads)
+        geo_map(leads, GEO_LEVELS[level])
     elif option == "Invoices":
-        geo_map(invoices)
+        geo_map(invoices, GEO_LEVELS[level])
+    if GEO_LEVELS[level] != "country":
+        st.caption("State and ZIP3 count every address of a record: its addresses list, a single address, "
+                   "or the customer's, including addresses without a country. Country counts the records' "
+                   "own addresses lists only.")
 
     st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,169 @@
+# graphics/geo_index.py
+"""
+Address index behind the globe.
+
+Records carry their addresses as an `addresses` list, a single `address`
+object, or either of those under `customer`. Once per dataset version every
+address is exploded into flat arrays:
+
+  • row      base row id of the record owning the address
+  • listed   the address is in the record's own `addresses` list
+  • us       country is a US spelling ("US", "USA", "United States", ...)
+  • state    index into STATE_CODES (-1 = not a recognised US state)
+  • zip3     first three digits of a 5-digit ZIP (-1 = none)
+
+The Country level counts what the globe always counted: listed addresses
+with a US spelling. State and ZIP3 read every address source.
+
+Country, state and ZIP text is normalised once per distinct value, then
+broadcast to addresses. Counting a (filtered) view is then a row mask and a
+bincount, whatever the number of addresses.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from graphics.columnar import Table, register_chunked, register_extender
+from graphics.snapshot import register_stored
+
+__all__ = ["US_COUNTRIES", "STATE_CODES", "AddressIndex", "address_index", "geo_counts"]
+
+US_COUNTRIES = {"US", "USA", "UNITED STATES", "UNITED STATES OF AMERICA", "U.S."}
+
+STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana",
+    "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon",
+    "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont", "VA": "Virginia",
+    "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+}
+STATE_CODES = list(STATES)
+_FIELDS = ("row", "listed", "us", "country_known", "state", "zip3")
+_STATE_LOOKUP = {**{c: i for i, c in enumerate(STATE_CODES)},
+                 **{name.upper(): i for i, name in enumerate(STATES.values())}}
+
+
+def _addresses(rec: Any) -> Tuple[List[Dict[str, Any]], bool]:
+    """(addresses of a record, whether they are its own `addresses` list)."""
+    if not isinstance(rec, dict):
+        return [], False
+    for holder in (rec, rec.get("customer")):
+        if not isinstance(holder, dict):
+            continue
+        many = holder.get("addresses")
+        if isinstance(many, list) and many:
+            return [a for a in many if isinstance(a, dict)], holder is rec
+        one = holder.get("address")
+        if isinstance(one, dict):
+            return [one], False
+    return [], False
+
+
+def _per_value(values: List[Any], fn, dtype) -> np.ndarray:
+    """`fn` applied once per distinct value (as text), broadcast back."""
+    s = pd.Series(values, dtype=object)
+    try:
+        codes, uniques = pd.factorize(s)
+    except TypeError:       # unhashable values: compared by their text form
+        codes, uniques = pd.factorize(s.map(lambda v: v if v is None else str(v)))
+    lookup = np.array([fn(None if u is None else str(u)) for u in uniques] + [fn(None)], dtype=dtype)
+    return lookup[codes]
+
+def _state(value) -> int:
+    return _STATE_LOOKUP.get((value or "").strip().upper().replace(".", ""), -1)
+
+def _zip3(value) -> int:
+    digits = (value or "").strip()[:5]
+    return int(digits[:3]) if len(digits) == 5 and digits.isdigit() else -1
+
+
+class AddressIndex:
+    """Every address of a dataset version, as flat arrays (see module docstring)."""
+
+    def __init__(self, row: np.ndarray, listed: np.ndarray, us: np.ndarray, country_known: np.ndarray,
+                 state: np.ndarray, zip3: np.ndarray):
+        self.row = row
+        self.listed = listed
+        self.us = us
+        self.country_known = country_known
+        self.state = state
+        self.zip3 = zip3
+
+    def __len__(self) -> int:
+        return len(self.row)
+
+    @classmethod
+    def build(cls, records: List[Any], first_row: int = 0) -> "AddressIndex":
+        owners, counts, listed, addrs = [], [], [], []
+        for i, rec in enumerate(records, first_row):
+            found, own = _addresses(rec)
+            if found:
+                owners.append(i)
+                counts.append(len(found))
+                listed.append(own)
+                addrs.extend(found)
+        counts = np.array(counts, dtype=np.int64)
+        rows = np.repeat(np.array(owners, dtype=np.int64), counts)
+        listed = np.repeat(np.array(listed, dtype=bool), counts)
+        countries = [a.get("country") for a in addrs]
+        states = [a.get("state") for a in addrs]
+        zips = [a.get("zip") or a.get("postal_code") or a.get("zip_code") for a in addrs]
+        # upper-cased as-is, the globe's original country match
+        country = _per_value(countries, lambda v: (v or "").upper(), object)
+        known = _per_value(countries, lambda v: bool((v or "").strip()), bool)
+        return cls(rows, listed, np.isin(country, list(US_COUNTRIES)), known,
+                   _per_value(states, _state, np.int16), _per_value(zips, _zip3, np.int16))
+
+    def extended(self, other: "AddressIndex") -> "AddressIndex":
+        return AddressIndex(*(np.concatenate((getattr(self, f), getattr(other, f))) for f in _FIELDS))
+
+
+def address_index(table: Table) -> AddressIndex:
+    """The dataset version's address index (built once, shared by all views)."""
+    return table.cached("geo_addresses", lambda base: AddressIndex.build(base.records))
+
+# appended rows (incremental reload) are indexed on their own and added
+register_extender("geo_addresses", lambda old, table, start, records:
+                  old.extended(AddressIndex.build(records, start)))
+register_chunked("geo_addresses", lambda old, start, records, partials:
+                 AddressIndex.build(records, start) if old is None else old.extended(AddressIndex.build(records, start)))
+# kept in the column store (graphics.snapshot): a restart needs no record parse for the globe
+register_stored("geo_addresses", lambda index: {f: getattr(index, f) for f in _FIELDS},
+                lambda table, parts: AddressIndex(*(parts[f] for f in _FIELDS)))
+
+
+def geo_counts(table: Table, level: str = "country") -> Tuple[Tuple[Any, int], ...]:
+    """
+    ((location, count), ...) of the addresses of `table`'s rows, most frequent first.
+
+    level "country": US addresses of the records' own `addresses` lists,
+    as one "United States" location (the globe's original count);
+    "state": two-letter codes; "zip3": 3-digit ZIP prefixes. State and ZIP3
+    count every address source, including addresses without a country,
+    since a US state or ZIP already places them.
+    """
+    index = address_index(table)
+    keep = np.zeros(len(table.base), dtype=bool)
+    keep[table.row_ids()] = True
+    keep = keep[index.row]
+    if level == "country":
+        n = int((keep & index.listed & index.us).sum())
+        return (("United States", n),) if n else ()
+    keep &= index.us | ~index.country_known
+    codes = index.state if level == "state" else index.zip3
+    codes = codes[keep & (codes >= 0)]
+    counts = np.bincount(codes, minlength=len(STATE_CODES) if level == "state" else 1000)
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    if level == "state":
+        return tuple((STATE_CODES[i], int(counts[i])) for i in order)
+    return tuple((f"{i:03d}", int(counts[i])) for i in order)
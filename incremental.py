@@ -0,0 +1,150 @@
+# graphics/incremental.py
+"""
+Incremental reloads of a rewritten JSON export.
+
+The upstream sync mostly appends records, so a reload tries, cheapest
+first:
+
+  1. byte-level append: the old file's bytes, up to its last element, are
+     unchanged; only the text after them is decoded
+  2. row-level append: the file was reformatted, but its first rows carry
+     the same (id, updated_at) as the old table's rows; every record is
+     decoded, only the rows after them are converted
+  3. changed rows: records are matched to old rows by (id, updated_at);
+     matched rows reuse their converted values, the rest are converted
+
+In cases 1 and 2 the old table is continued (TableBuilder(head=...)), so
+derived data with a registered extender (search text and index, ...) is
+extended rather than rebuilt. Case 3 rebuilds derived data on demand.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from graphics.columnar import ROW_KEY, Table, TableBuilder, row_keys
+from graphics.json_stream import ArrayReader
+
+__all__ = ["source_state", "reload_table"]
+
+HASH_BLOCK = 1 << 20
+TAIL_BLOCK = 1 << 16
+_WS = b" \t\r\n"
+
+
+def _tail_offset(f, size: int) -> Optional[int]:
+    """Byte offset just past the last element of the top-level array, None if there is none."""
+    f.seek(max(0, size - TAIL_BLOCK))
+    end = f.read().rstrip(_WS)
+    if not end.endswith(b"]"):
+        return None
+    body = end[:-1].rstrip(_WS)
+    if not body or body.endswith(b"["):
+        return None
+    return size - TAIL_BLOCK + len(body) if size > TAIL_BLOCK else len(body)
+
+
+def source_state(path: str, mark: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Content hash of an export, where its last element ends ("tail") and the
+    hash of the bytes before that. With `mark`, also the hash of the bytes
+    before offset `mark` ("mark_hash"), in the same single read.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        tail = _tail_offset(f, size)
+        f.seek(0)
+        h = hashlib.blake2b(digest_size=16)
+        cuts = sorted({c for c in (tail, mark) if c is not None and c <= size})
+        hashed, at = 0, {}
+        for cut in cuts + [None]:
+            while cut is None or hashed < cut:
+                block = f.read(HASH_BLOCK if cut is None else min(HASH_BLOCK, cut - hashed))
+                if not block:
+                    break
+                h.update(block)
+                hashed += len(block)
+            if cut is not None:
+                at[cut] = h.copy().hexdigest()
+    return {"digest": h.hexdigest(), "size": size, "tail": tail,
+            "prefix": at.get(tail), "mark_hash": at.get(mark)}
+
+
+# ---------- strategies ----------
+def _appended_bytes(path: str, old: Dict[str, Any], new: Dict[str, Any]):
+    """Records after the old last element, or None when the file wasn't only appended to."""
+    if old.get("tail") is None or new.get("mark_hash") != old.get("prefix"):
+        return None
+    with open(path, "rb") as f:
+        f.seek(old["tail"])
+        rest = f.read().decode("utf-8", errors="replace").lstrip(" \t\r\n")
+    if rest.startswith("]"):
+        return [], 0
+    if not rest.startswith(","):
+        return None
+    reader = ArrayReader(io.StringIO("[" + rest[1:]))
+    return list(reader), reader.malformed
+
+
+def _continue(old: Table, records: List[Dict[str, Any]], version: Any, chunk_rows: int,
+              load_records: Optional[Callable[[], List[Dict[str, Any]]]], extend: bool = True) -> Table:
+    builder = TableBuilder(old.name, version=version, head=old)
+    for start in range(0, len(records), chunk_rows):
+        builder.append(records[start:start + chunk_rows])
+    return builder.finish(load_records, extend=extend)
+
+
+def _matched(old: Table, records: List[Dict[str, Any]], keys: np.ndarray, version: Any,
+             chunk_rows: int) -> Table:
+    """New table over `records`, reusing old rows whose (id, updated_at) still match."""
+    old_keys = old.col(ROW_KEY)
+    order = np.argsort(old_keys, kind="stable")
+    pos = np.minimum(np.searchsorted(old_keys[order], keys), max(len(order) - 1, 0))
+    hit = (old_keys[order][pos] == keys) if len(order) else np.zeros(len(keys), dtype=bool)
+    fresh = np.flatnonzero(~hit)
+    # convert only the unmatched records, appended after the old rows, then reorder
+    grown = _continue(old, [records[i] for i in fresh], version, chunk_rows, None, extend=False)
+    source = np.empty(len(records), dtype=np.intp)
+    source[hit] = order[pos[hit]]
+    source[fresh] = len(old) + np.arange(len(fresh))
+    columns = {f: c[source] for f, c in grown._columns.items()}
+    present = {f: p[source] for f, p in grown._present.items()}
+    return Table(old.name, records, columns, present, grown._categories, version=version)
+
+
+def reload_table(old: Table, path: str, old_state: Dict[str, Any], new_state: Dict[str, Any],
+                 old_report: Optional[Dict[str, Any]],
+                 load_records: Callable[[int], Callable[[], List[Dict[str, Any]]]],
+                 chunk_rows: int = 50_000) -> Optional[Tuple[Table, Dict[str, Any]]]:
+    """
+    (table, report) for the rewritten export at `path`, built from `old`
+    plus what changed; None when the file can't be read this way.
+    `load_records(n_rows)` supplies a deferred record parse when needed.
+    """
+    old = old.base
+    if ROW_KEY not in old:
+        return None
+    version = new_state["digest"]
+    try:
+        appended = _appended_bytes(path, old_state, new_state)
+        if appended is not None:
+            records, malformed = appended
+            report = {"records": len(old) + len(records), "error": None,
+                      "malformed": (old_report or {}).get("malformed", 0) + malformed}
+            return _continue(old, records, version, chunk_rows, load_records(len(old) + len(records))), report
+        with open(path, encoding="utf-8-sig", errors="replace") as f:
+            reader = ArrayReader(f)
+            records = list(reader)
+    except (OSError, ValueError):
+        return None
+    report = {"records": len(records), "malformed": reader.malformed, "error": None}
+    keys = np.concatenate([row_keys(records[i:i + chunk_rows]) for i in range(0, len(records), chunk_rows)]
+                          or [np.empty(0, dtype=np.uint64)])
+    n = len(old)
+    if len(keys) >= n and np.array_equal(keys[:n], old.col(ROW_KEY)):
+        return _continue(old, records[n:], version, chunk_rows, lambda: records), report
+    return _matched(old, records, keys, version, chunk_rows), report
@@ -1,17 +1,23 @@
 import streamlit as st
 import plotly.express as px
 from graphics.data_loader import get_charts_data
+from graphics.figure_cache import cached_figure
 from graphics.theme import EMERALD, CARD_BG
 
-def jobs_by_status(invoices, jobs, customers, estimates):
+def _jobs_status_figure(df):
+    fig = px.bar(df, x="status", y="count", text_auto=True,
+                 color_discrete_sequence=[EMERALD], template="plotly_dark")
+    fig.update_layout(height=190, margin=dict(l=0,r=0,t=0,b=0),
+                      paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG, showlegend=False)
+    return fig
+
+def jobs_by_status(invoices, jobs, customers, estimates, charts=None):
     st.markdown("<div class='card'><div class='card-header'>🛠️ Jobs by Status</div>", unsafe_allow_html=True)
-    df = get_charts_data(invoices, jobs, customers, estimates, chart="jobs_status")
+    df = (charts["jobs_status"] if charts is not None
+          else get_charts_data(invoices, jobs, customers, estimates, chart="jobs_status"))
     if df.empty:
         st.info("No job status data available.")
     else:
-        fig = px.bar(df, x="status", y="count", text_auto=True,
-                     color_discrete_sequence=[EMERALD], template="plotly_dark")
-        fig.update_layout(height=190, margin=dict(l=0,r=0,t=0,b=0),
-                          paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG, showlegend=False)
+        fig = cached_figure("jobs_by_status", df, _jobs_status_figure)
         st.plotly_chart(fig, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,165 @@
+# graphics/json_stream.py
+"""
+Streaming reader for the exported JSON datasets (one top-level array).
+
+The file is read in fixed-size blocks and decoded one array element at a
+time, so the whole text is never held in memory: besides the records
+themselves, the reader keeps one block plus the element being decoded.
+
+A broken element no longer costs the whole file. It is skipped up to the
+next top-level comma and counted in `malformed`; so are elements that are
+not JSON objects.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, TextIO
+
+__all__ = ["ArrayReader", "BLOCK_CHARS", "MAX_ELEMENT_CHARS"]
+
+BLOCK_CHARS = 1 << 20                 # characters read per block
+MAX_ELEMENT_CHARS = 256 << 20         # a single record larger than this ends the read
+
+_WS = re.compile(r"[ \t\n\r]*")
+_SEP = re.compile(r"[ \t\n\r]*(,?)[ \t\n\r]*")
+# a complete string, a lone quote (string not finished in this buffer), or structure
+_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{},]')
+
+
+def _element_end(buf: str, pos: int) -> int:
+    """Index of the `,`/`]` that ends the element starting at `pos`, or -1 if not in `buf` yet."""
+    depth = 0
+    for m in _TOKENS.finditer(buf, pos):
+        tok = m.group()
+        if tok[0] == '"':
+            if len(tok) == 1:
+                return -1
+        elif tok in "[{":
+            depth += 1
+        elif tok in "]}":
+            if depth == 0:
+                return m.start()
+            depth -= 1
+        elif depth == 0:
+            return m.start()
+    return -1
+
+
+class ArrayReader:
+    """
+    Iterate the objects of a top-level JSON array from a text file.
+
+    After iteration `records` and `malformed` hold the counts; a file whose
+    top level is not an array counts as one malformed element.
+    """
+
+    def __init__(self, f: TextIO, block_chars: int = BLOCK_CHARS):
+        self._f = f
+        self._block = block_chars
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.records = 0
+        self.malformed = 0
+
+    # --- buffer ---
+    def _fill(self) -> bool:
+        """Read one more block; drops the consumed prefix. False at end of file."""
+        if self._eof:
+            return False
+        data = self._f.read(self._block)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        if len(self._buf) > MAX_ELEMENT_CHARS + self._block:
+            raise ValueError("JSON element too large")
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace character ("" at end of file), without consuming it."""
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _skip_element(self, counted: bool = False) -> bool:
+        """Skip a broken element, counted unless `counted`; False when the rest of the file is unusable."""
+        if not counted:
+            self.malformed += 1
+        while True:
+            end = _element_end(self._buf, self._pos)
+            if end >= 0:
+                self._pos = end
+                return True
+            if not self._fill():
+                return False
+
+    # --- iteration ---
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        # json.load shares key strings across the whole document; decoding one
+        # element at a time would give every record private copies of its keys
+        share = {}.setdefault
+        decoder = json.JSONDecoder(object_pairs_hook=lambda pairs: {share(k, k): v for k, v in pairs})
+        if self._peek() != "[":
+            if self._peek():
+                self.malformed += 1
+            return
+        self._pos += 1
+        if self._peek() == "]":
+            return
+        while True:
+            if (self._pos >= len(self._buf) or self._buf[self._pos] in " \t\n\r") and not self._peek():
+                self.malformed += 1             # truncated file
+                return
+            counted = False                     # this element is already in `malformed`
+            try:
+                obj, end = decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if _element_end(self._buf, self._pos) < 0 and self._fill():
+                    continue                    # element continues in the next block
+                if not self._skip_element():
+                    return
+                counted = True
+            else:
+                if end == len(self._buf) and self._fill():
+                    continue                    # a number may continue in the next block
+                self._pos = end
+                if isinstance(obj, dict):
+                    self.records += 1
+                    yield obj
+                else:
+                    self.malformed += 1
+                    counted = True
+                sep = _SEP.match(self._buf, self._pos)
+                if sep.group(1) and sep.end() < len(self._buf):
+                    self._pos = sep.end()       # fast path: ", " and the next element is buffered
+                    continue
+            while True:                         # separator, skipping junk before it
+                sep = self._peek()
+                if sep == ",":
+                    self._pos += 1
+                    break
+                if sep == "]":
+                    return
+                if not sep:
+                    self.malformed += 1         # truncated file
+                    return
+                if not self._skip_element(counted):   # e.g. the rest of a number cut by a block boundary
+                    return
+                counted = True
+
+    def chunks(self, size: int) -> Iterator[List[Dict[str, Any]]]:
+        """The same records, grouped into lists of at most `size`."""
+        chunk: List[Dict[str, Any]] = []
+        for rec in self:
+            chunk.append(rec)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
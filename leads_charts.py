@@ -2,31 +2,42 @@ import streamlit as st
 import plotly.express as px
 import pandas as pd
 from graphics.data_loader import get_charts_data
+from graphics.figure_cache import cached_figure
 from graphics.theme import EMERALD, GOLD, WHITE, CARD_BG
 
-def leads_by_source(invoices, jobs, customers, estimates):
+def _leads_bar_figure(df):
+    fig = px.bar(df.sort_values("count", ascending=False), x="source", y="count",
+                 text_auto=True, color_discrete_sequence=[EMERALD], template="plotly_dark")
+    fig.update_layout(height=190, margin=dict(l=0,r=0,t=0,b=0),
+                      paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG, showlegend=False)
+    return fig
+
+def _leads_line_figure(df):
+    fig = px.line(df, x="date", y="leads", markers=True,
+                  color_discrete_sequence=[GOLD], template="plotly_dark")
+    fig.update_layout(height=190, margin=dict(l=0,r=0,t=0,b=0),
+                      paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG)
+    return fig
+
+def leads_by_source(invoices, jobs, customers, estimates, charts=None):
     st.markdown("<div class='card'><div class='card-header'>🧲 Leads by Source</div>", unsafe_allow_html=True)
-    df = get_charts_data(invoices, jobs, customers, estimates, chart="leads_by_source")
+    df = (charts["leads_by_source"] if charts is not None
+          else get_charts_data(invoices, jobs, customers, estimates, chart="leads_by_source"))
     if df.empty:
         st.info("No lead source data available.")
     else:
-        fig = px.bar(df.sort_values("count", ascending=False), x="source", y="count",
-                     text_auto=True, color_discrete_sequence=[EMERALD], template="plotly_dark")
-        fig.update_layout(height=190, margin=dict(l=0,r=0,t=0,b=0),
-                          paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG, showlegend=False)
+        fig = cached_figure("leads_by_source", df, _leads_bar_figure)
         st.plotly_chart(fig, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
-def leads_sparkline(invoices, jobs, customers, estimates, title="📈 Leads Trend"):
+def leads_sparkline(invoices, jobs, customers, estimates, title="📈 Leads Trend", charts=None):
     st.markdown(f"<div class='card'><div class='card-header'>{title}</div>", unsafe_allow_html=True)
-    df = get_charts_data(invoices, jobs, customers, estimates, chart="leads_trend")
+    df = (charts["leads_trend"] if charts is not None
+          else get_charts_data(invoices, jobs, customers, estimates, chart="leads_trend"))
     if df.empty:
         st.info("No leads trend data available.")
     else:
-        fig = px.line(df, x="date", y="leads", markers=True,
-                      color_discrete_sequence=[GOLD], template="plotly_dark")
-        fig.update_layout(height=190, margin=dict(l=0,r=0,t=0,b=0),
-                          paper_bgcolor=CARD_BG, plot_bgcolor=CARD_BG)
+        fig = cached_figure("leads_sparkline", df, _leads_line_figure)
         st.plotly_chart(fig, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
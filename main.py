@@ -31,15 +31,15 @@ st.markdown(
 )
 
 # ----------------------------
-# NAVIGATION TABS
+# NAVIGATION
 # ----------------------------
-tabs = st.tabs(["📊 Graphics", "📂 Data Info", "⬇️ Download & History"])
+# st.tabs runs every tab's code on each rerun; only the selected view runs here,
+# so switching views (or clicking inside one) doesn't load or render the others.
+VIEWS = {
+    "📊 Graphics": show_main_dashboard,
+    "📂 Data Info": show_data_info,
+    "⬇️ Download & History": show_update_download,
+}
 
-with tabs[0]:
-    show_main_dashboard()
-
-with tabs[1]:
-    show_data_info()
-
-with tabs[2]:
-    show_update_download()
+view = st.radio("View", list(VIEWS), horizontal=True, key="view", label_visibility="collapsed")
+VIEWS[view]()
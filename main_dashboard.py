@@ -7,9 +7,9 @@ from graphics.jobs_charts import jobs_by_status
 from graphics.geo_charts import geo_section
 from graphics.details_charts import details_charts
 from graphics.progress_card import paid_vs_total_gauge
-from graphics.data_loader import load_data, apply_filters
+from graphics.data_loader import load_data, dashboard_data
 from graphics.filters import dashboard_filters
-from graphics.metrics import get_kpis, get_charts_data
+from graphics.metrics import get_charts_data
 
 # Utility for section headers
 def section_title(title, emoji="📊"):
@@ -29,18 +29,28 @@ def section_title(title, emoji="📊"):
         unsafe_allow_html=True
     )
 
+# Sections with their own widgets (geo dataset picker, per-table searches)
+# rerun on their own when those change, from the data the page already
+# computed, instead of rerunning the whole dashboard. Streamlit versions
+# without fragments rerun the page as before.
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda fn: fn)
+
+@_fragment
+def isolated_section(render, *args, **kwargs):
+    render(*args, **kwargs)
+
 def show_main_dashboard():
     # Load + apply filters
     invoices, jobs, customers, estimates = load_data()
     filter_values = dashboard_filters()
-    invoices, jobs, customers, estimates = apply_filters(
-        invoices, jobs, customers, estimates, filter_values
-    )
 
     # -----------------------------
     # 0. Compute KPIs first
     # -----------------------------
-    kpis = get_kpis(invoices, jobs, customers, estimates)
+    # filtered views + KPIs + every chart dataset below, shared across sessions
+    (invoices, jobs, customers, estimates), kpis, charts = dashboard_data(
+        invoices, jobs, customers, estimates, filter_values, session=st.session_state
+    )
 
     # -----------------------------
     # 1. KPI Row
@@ -60,7 +70,7 @@ def show_main_dashboard():
     # 2. Globe centerpiece
     # -----------------------------
     section_title("Geographic Insights", "🌍")
-    geo_section(invoices, jobs, customers, estimates)
+    isolated_section(geo_section, invoices, jobs, customers, estimates)
 
     # -----------------------------
     # 3. Trends
@@ -68,9 +78,9 @@ def show_main_dashboard():
     section_title("Trends & Growth", "📈")
     col1, col2 = st.columns(2, gap="small")
     with col1:
-        revenue_sparkline(invoices, jobs, customers, estimates, title="📈 Revenue Trend (MoM)")
+        revenue_sparkline(invoices, jobs, customers, estimates, charts=charts, title="📈 Revenue Trend (MoM)")
     with col2:
-        leads_sparkline(invoices, jobs, customers, estimates, title="📈 Leads Trend (MoM)")
+        leads_sparkline(invoices, jobs, customers, estimates, charts=charts, title="📈 Leads Trend (MoM)")
 
     # -----------------------------
     # 4. Revenue Breakdown
@@ -78,9 +88,9 @@ def show_main_dashboard():
     section_title("Revenue Breakdown", "💰")
     col3, col4 = st.columns(2, gap="small")
     with col3:
-        revenue_bar_top10(invoices, jobs, customers, estimates)
+        revenue_bar_top10(invoices, jobs, customers, estimates, charts=charts)
     with col4:
-        revenue_by_source_donut(invoices, jobs, customers, estimates)
+        revenue_by_source_donut(invoices, jobs, customers, estimates, charts=charts)
 
     # -----------------------------
     # 5. Jobs & Leads Overview
@@ -88,21 +98,21 @@ def show_main_dashboard():
     section_title("Jobs & Leads Overview", "🧾")
     col5, col6 = st.columns(2, gap="small")
     with col5:
-        jobs_by_status(invoices, jobs, customers, estimates)
+        jobs_by_status(invoices, jobs, customers, estimates, charts=charts)
     with col6:
-        leads_by_source(invoices, jobs, customers, estimates)
+        leads_by_source(invoices, jobs, customers, estimates, charts=charts)
 
     # -----------------------------
     # 6. Financial Health
     # -----------------------------
     section_title("Financial Health", "💹")
     paid_vs_total_gauge(
-        revenue=sum(i.get("amount", 0) for i in invoices),
-        outstanding=sum(i.get("due_amount", 0) for i in invoices)
+        revenue=invoices.total("amount"),
+        outstanding=invoices.total("due_amount"),
     )
 
     # -----------------------------
     # 7. Detailed Records
     # -----------------------------
     section_title("Detailed Records", "📑")
-    details_charts(invoices, jobs)
+    isolated_section(details_charts, invoices, jobs)
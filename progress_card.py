@@ -1,12 +1,19 @@
 import streamlit as st
 import plotly.graph_objects as go
 from graphics.theme import EMERALD, CARD_BG
+from graphics.figure_cache import cached_figure
 
 def paid_vs_total_gauge(revenue: float, outstanding: float, title="Paid vs Total"):
     percent_paid = 0 if revenue == 0 else max(0, min(1, 1 - (outstanding / revenue)))
     value = round(percent_paid * 100, 1)
 
     st.markdown(f"<div class='card'><div class='card-header'>📊 {title}</div>", unsafe_allow_html=True)
+    # rebuilt only when the rounded percentage changes (graphics.figure_cache)
+    fig = cached_figure("paid_vs_total_gauge", value, _gauge_figure)
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def _gauge_figure(value):
     fig = go.Figure(go.Indicator(
         mode="gauge+number",
         value=value,
@@ -23,5 +30,4 @@ def paid_vs_total_gauge(revenue: float, outstanding: float, title="Paid vs Total
     ))
     fig.update_layout(height=190, margin=dict(l=0,r=0,t=0,b=0),
                       paper_bgcolor=CARD_BG, font={'color':'white'})
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown("</div>", unsafe_allow_html=True)
+    return fig
@@ -0,0 +1,119 @@
+# graphics/result_cache.py
+"""
+Process-wide cache of filter results, shared by every session.
+
+Many sessions look at the same view (the default last-90-days range, no
+search). A result is keyed by a fingerprint of the data versions and the
+normalised sidebar filters, and holds whatever the dashboard derived for
+that view: filtered row ids, the KPI dict, chart frames.
+
+Entries are evicted least-recently-used once their estimated size exceeds
+the byte budget. An entry larger than the whole budget is not stored (and
+logged). Cached values are shared: callers must not mutate them.
+"""
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["RESULT_CACHE_BYTES", "ResultCache", "RESULTS", "nbytes"]
+
+RESULT_CACHE_BYTES = 256 << 20          # default budget of the shared cache
+
+log = logging.getLogger(__name__)
+
+
+def nbytes(value: Any) -> int:
+    """Rough in-memory size of a cached value (arrays, frames, containers of them)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(nbytes(k) + nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe LRU mapping with a byte budget and hit/miss counters."""
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._oversize = 0              # entries too large for the budget, not stored
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()    # key -> (value, size)
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """Store `value`, sized by nbytes() unless the caller knows better (`size`)."""
+        size = nbytes(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                self._oversize += 1
+                log.warning("result cache: %.1f MB entry exceeds the %.0f MB budget, not cached",
+                            size / 2**20, self.max_bytes / 2**20)
+                return                          # would evict everything else for one entry
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "oversize": self._oversize,
+            }
+
+
+RESULTS = ResultCache()
@@ -0,0 +1,233 @@
+# graphics/rollup.py
+"""
+Pre-aggregated daily rollup cubes behind the main dashboard's KPIs and charts.
+
+Every dashboard number is a sum or count grouped by day and a few labels.
+Each dataset version gets small cubes (built on first use, cached on the
+Table) whose cells are its rows summed per
+
+    (day, midnight?, label fields...)
+
+  • invoices:  day                                      -> count, revenue, paid, due
+  • jobs:      day, work_status (+ description,
+               + customer.lead_source, one cube each)   -> count, revenue, cancelled,
+                                                           has description / work_status
+  • customers: day, lead_source                         -> count, has lead source,
+                                                           has lead_source key
+
+The first cube of a dataset is split by its filter fields only and answers
+its KPIs; the others add one chart grouping each, which keeps every cube
+at O(days x categories) cells rather than the product of all labels.
+
+`midnight?` marks rows stamped exactly 00:00, which is what keeps the
+sidebar's "To" bound (a midnight timestamp, inclusive) exact at day
+granularity. Date and label filters then select cells instead of rows, so
+KPIs and chart datasets cost O(cells) whatever the number of records.
+A free-text search can't be answered from cells; `dashboard_summary` then
+returns None and callers fall back to the filtered rows.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from graphics.chart_data import ChartFrames, build_charts
+from graphics.columnar import DAY_NS, NAT, Table, register_extender
+from graphics.filter_engine import FILTERED, normalize_filters
+from graphics.metrics import cancelled_jobs, has_lead_source, invoice_amounts, kpi_dict
+
+__all__ = ["CUBE_FIELDS", "Cube", "cube", "dashboard_summary"]
+
+# Label fields of each dataset's cubes; the first is split by the filter fields only.
+CUBE_FIELDS: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "invoices": ((),),
+    "jobs": (("work_status",), ("work_status", "description"), ("work_status", "customer.lead_source")),
+    "customers": (("lead_source",),),
+}
+
+
+def _measures(table: Table) -> Dict[str, np.ndarray]:
+    """Per-row values summed into cells (besides the row count)."""
+    if table.name == "invoices":
+        paid, due = invoice_amounts(table)
+        return {"revenue": np.nan_to_num(table.col("amount")), "paid": paid, "due": due}
+    if table.name == "jobs":
+        return {"revenue": np.nan_to_num(table.col("total_amount")),
+                "cancelled": cancelled_jobs(table).astype(np.float64),
+                "has:description": table.has("description").astype(np.float64),
+                "has:work_status": table.has("work_status").astype(np.float64)}
+    if table.name == "customers":
+        return {"has_lead": has_lead_source(table).astype(np.float64),
+                "has:lead_source": table.has("lead_source").astype(np.float64)}
+    return {}
+
+
+class Cube:
+    """One dataset's rows summed per (day, midnight, label codes) cell."""
+
+    def __init__(self, day: np.ndarray, midnight: np.ndarray, codes: Dict[str, np.ndarray],
+                 sums: Dict[str, np.ndarray], first: np.ndarray):
+        self.day = day              # day number per cell (NAT for rows without a timestamp)
+        self.midnight = midnight
+        self.codes = codes          # label code per cell, per field
+        self.sums = sums            # "count" plus every measure, per cell
+        self.first = first          # smallest base row id in the cell (keeps first-seen order)
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    @classmethod
+    def _aggregate(cls, day, midnight, codes, sums, first) -> "Cube":
+        """Group items (rows, or cells of several cubes) by their cell key."""
+        parts = [day, midnight.astype(np.int64)] + [codes[f] for f in codes]
+        order = np.lexsort(parts[::-1])
+        if not len(order):
+            return cls(day, midnight, codes, sums, first)
+        sorted_parts = [p[order] for p in parts]
+        change = np.zeros(len(order), dtype=bool)
+        change[0] = True
+        for p in sorted_parts:
+            change[1:] |= p[1:] != p[:-1]
+        starts = np.flatnonzero(change)
+        keep = order[starts]
+        return cls(day[keep], midnight[keep], {f: c[keep] for f, c in codes.items()},
+                   {m: np.add.reduceat(v[order], starts) for m, v in sums.items()},
+                   np.minimum.reduceat(first[order], starts))
+
+    @classmethod
+    def build(cls, table: Table, fields: Tuple[str, ...]) -> "Cube":
+        """Cube split by `fields` over the rows of `table` (a base table or a view of it)."""
+        t = table.times()
+        timed = t != NAT
+        day = np.where(timed, t // DAY_NS, NAT)
+        midnight = timed & (t % DAY_NS == 0)
+        codes = {f: table.col(f) for f in fields}
+        sums = {"count": np.ones(len(table), dtype=np.float64), **_measures(table)}
+        return cls._aggregate(day, midnight, codes, sums, table.row_ids().astype(np.int64))
+
+    def merged(self, other: "Cube") -> "Cube":
+        """Cells of both cubes, summed where they share a key."""
+        return Cube._aggregate(
+            np.concatenate((self.day, other.day)), np.concatenate((self.midnight, other.midnight)),
+            {f: np.concatenate((c, other.codes[f])) for f, c in self.codes.items()},
+            {m: np.concatenate((v, other.sums[m])) for m, v in self.sums.items()},
+            np.concatenate((self.first, other.first)))
+
+    def select(self, table: Table, spec: Mapping[str, Any]) -> Optional[np.ndarray]:
+        """Cells passing the filters of `spec`; None when they can't be decided per day."""
+        mask = np.ones(len(self), dtype=bool)
+        date_from, date_to = spec["date_from"], spec["date_to"]
+        if date_from is not None or date_to is not None:
+            bounds = [b for b in (date_from, date_to) if b is not None]
+            if any(pd.isna(b) for b in bounds):
+                return np.zeros(len(self), dtype=bool)
+            if any(b.value % DAY_NS for b in bounds):
+                return None
+            mask &= self.day != NAT
+            if date_from is not None:
+                mask &= self.day >= date_from.value // DAY_NS
+            if date_to is not None:
+                last = date_to.value // DAY_NS
+                mask &= (self.day < last) | ((self.day == last) & self.midnight)
+        for key, field in FILTERED.get(table.name, {}).items():
+            allowed = spec[key]
+            if allowed:
+                lookup = np.array(["Unknown" in allowed]
+                                  + [(c or "Unknown") in allowed for c in table.categories(field)], dtype=bool)
+                mask &= lookup[self.codes[field] + 1]
+        return mask
+
+
+def cube(table: Table, fields: Tuple[str, ...]) -> Cube:
+    """A rollup cube of a dataset version (built once, shared by all views)."""
+    return table.cached(("rollup", fields), lambda base: Cube.build(base, fields))
+
+# appended rows (incremental reload) are rolled up on their own and merged in
+def _extender(fields: Tuple[str, ...]):
+    return lambda old, table, start, records: old.merged(
+        Cube.build(table.take(np.arange(start, len(table))), fields))
+
+for _cubes in CUBE_FIELDS.values():
+    for _fields in _cubes:
+        register_extender(("rollup", _fields), _extender(_fields))
+
+
+class CubeFrames(ChartFrames):
+    """ChartFrames answered from selected cube cells instead of rows."""
+
+    def __init__(self, tables: Dict[str, Table], spec: Mapping[str, Any]):
+        self.tables = tables
+        self._spec = spec
+        self._cells: Dict[Any, Tuple[Cube, np.ndarray]] = {}
+
+    def cells(self, name: str, field: Optional[str] = None) -> Tuple[Cube, Optional[np.ndarray]]:
+        """(cube, selected cells) of the dataset's first cube, or of the one split by `field`."""
+        fields = next(f for f in CUBE_FIELDS[name] if field is None or field in f)
+        if (name, fields) not in self._cells:
+            c = cube(self.tables[name], fields)
+            self._cells[name, fields] = (c, c.select(self.tables[name], self._spec))
+        return self._cells[name, fields]
+
+    def total(self, name: str, measure: str) -> float:
+        """Sum of a measure over the selected cells."""
+        c, m = self.cells(name)
+        return float(c.sums[measure][m].sum())
+
+    def size(self, name: str) -> int:
+        if name not in CUBE_FIELDS:
+            return len(self.tables[name])
+        return int(round(self.total(name, "count")))
+
+    def any_present(self, name: str, field: str) -> bool:
+        return self.total(name, "has:" + field) > 0
+
+    def revenue_by(self, name: str, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        c, m = self.cells(name, field)
+        slots = c.codes[field][m] + 1
+        n = len(self.categories(name, field)) + 1
+        return (np.bincount(slots, weights=c.sums["revenue"][m], minlength=n),
+                np.bincount(slots, weights=c.sums["count"][m], minlength=n).round().astype(np.int64))
+
+    def count_by(self, name: str, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        c, m = self.cells(name, field)
+        slots = c.codes[field][m] + 1
+        n = len(self.categories(name, field)) + 1
+        first = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(first, slots, c.first[m])
+        return np.bincount(slots, weights=c.sums["count"][m], minlength=n).round().astype(np.int64), first
+
+    def by_day(self, name: str, revenue: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        c, m = self.cells(name)
+        m = m & (c.day != NAT)
+        days, inverse = np.unique(c.day[m], return_inverse=True)
+        values = np.bincount(inverse, weights=c.sums["revenue" if revenue else "count"][m], minlength=len(days))
+        return days, (values if revenue else values.round().astype(np.int64))
+
+
+def dashboard_summary(invoices: Table, jobs: Table, customers: Table, estimates: Table,
+                      filters: Optional[Mapping[str, Any]],
+                      charts: Optional[Sequence[str]] = None) -> Optional[Tuple[Dict[str, Any], Dict[str, pd.DataFrame]]]:
+    """
+    (KPIs, chart datasets) for the sidebar filters, straight from the cubes.
+
+    Takes the unfiltered Tables. None when the cubes can't answer (a search
+    is set, or a date bound isn't a whole day): use the filtered rows then.
+    """
+    spec = normalize_filters(filters)
+    tables = {"invoices": invoices, "jobs": jobs, "customers": customers, "estimates": estimates}
+    if spec["search"] or any(tables[name].rows is not None for name in CUBE_FIELDS):
+        return None
+    frames = CubeFrames(tables, spec)
+    if any(frames.cells(name)[1] is None for name in CUBE_FIELDS):
+        return None
+
+    n_jobs = frames.size("jobs")
+    if estimates:
+        leads_count = len(estimates)
+    else:
+        leads_count = int(round(frames.total("customers", "has_lead")))
+    kpis = kpi_dict(frames.total("invoices", "paid"), frames.total("invoices", "due"),
+                    n_jobs - int(round(frames.total("jobs", "cancelled"))), leads_count)
+    return kpis, build_charts(frames, charts)
@@ -0,0 +1,177 @@
+# graphics/search_index.py
+"""
+Inverted trigram index for the sidebar "Search" filter.
+
+Search semantics are unchanged: a record matches when the query is a
+substring of its lowercased JSON text. The index only narrows which
+records have to be checked:
+
+  • every record's text is cut into 3-byte grams (json.dumps output is pure
+    ASCII, so bytes and characters coincide)
+  • postings map each gram to the sorted row ids containing it
+  • a query intersects the postings of its grams, then confirms the
+    substring on the few surviving rows
+
+Grams present in most rows (JSON keys, punctuation) select nothing and are
+dropped as stop-grams. Queries made only of stop-grams, or shorter than
+three characters, fall back to a vectorised scan of the texts.
+"""
+from __future__ import annotations
+
+import json
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from graphics.columnar import Table, register_extender
+
+__all__ = ["TrigramIndex", "search_text", "search_rows"]
+
+CHUNK_ROWS = 20_000     # records cut into grams at a time (bounds build memory)
+STOP_FRACTION = 0.5     # grams in more than this share of a chunk's rows are not indexed
+
+
+def _sorted_unique(a: np.ndarray) -> np.ndarray:
+    # sort + neighbour diff; much faster than np.unique's hashing on large int64 arrays
+    a = np.sort(a)
+    return a[np.concatenate(([True], a[1:] != a[:-1]))] if len(a) else a
+
+
+def _grams(data: np.ndarray) -> np.ndarray:
+    """21-bit codes of every 3-byte window of an ASCII byte array."""
+    d = data.astype(np.int32)
+    return (d[:-2] << 14) | (d[1:-1] << 7) | d[2:]
+
+
+class TrigramIndex:
+    """Gram -> sorted row ids, stored CSR-style in three flat arrays."""
+
+    def __init__(self, grams: np.ndarray, offsets: np.ndarray, postings: np.ndarray,
+                 stop: np.ndarray, n_rows: int):
+        self.grams = grams          # sorted distinct indexed grams
+        self.offsets = offsets      # postings[offsets[i]:offsets[i+1]] belong to grams[i]
+        self.postings = postings
+        self.stop = stop            # sorted grams that were too common to index
+        self.n_rows = n_rows
+
+    @classmethod
+    def build(cls, texts: List[str], first_row: int = 0) -> "TrigramIndex":
+        """Index of `texts`, numbered from `first_row` on."""
+        keys, stops = [], []
+        for start in range(0, len(texts), CHUNK_ROWS):
+            chunk = texts[start:start + CHUNK_ROWS]
+            start += first_row
+            # NUL never occurs in json.dumps output, so it safely separates rows
+            buf = np.frombuffer("\0".join(chunk).encode("ascii"), dtype=np.uint8)
+            if len(buf) < 3:
+                continue
+            lens = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk)) + 1
+            row = np.repeat(np.arange(start, start + len(chunk), dtype=np.int64), lens)[:len(buf) - 2]
+            ok = (buf[:-2] != 0) & (buf[1:-1] != 0) & (buf[2:] != 0)
+            key = _sorted_unique((_grams(buf)[ok].astype(np.int64) << 32) | row[ok])
+            gram = key >> 32
+            # keys are sorted by gram, so each gram's row count is a run length
+            starts = np.flatnonzero(np.concatenate(([True], gram[1:] != gram[:-1])))
+            counts = np.diff(np.append(starts, len(gram)))
+            common = gram[starts[counts > STOP_FRACTION * len(chunk)]]
+            stops.append(common)
+            keys.append(key[~np.isin(gram, common)])
+
+        stop = _sorted_unique(np.concatenate(stops)) if stops else np.empty(0, np.int64)
+        key = np.sort(np.concatenate(keys)) if keys else np.empty(0, np.int64)
+        return cls._from_keys(key, stop, first_row + len(texts))
+
+    @classmethod
+    def _from_keys(cls, key: np.ndarray, stop: np.ndarray, n_rows: int) -> "TrigramIndex":
+        """CSR index from sorted (gram << 32 | row) keys."""
+        # a gram dropped in any chunk is unusable everywhere, or lookups would miss rows
+        key = key[~np.isin(key >> 32, stop)]
+        gram = key >> 32
+        starts = np.flatnonzero(np.concatenate(([True], gram[1:] != gram[:-1]))) if len(gram) else np.empty(0, np.int64)
+        grams = gram[starts]
+        offsets = np.append(starts, len(key)).astype(np.int64)
+        postings = (key & 0xFFFFFFFF).astype(np.int32)
+        return cls(grams, offsets, postings, stop, n_rows)
+
+    def _keys(self) -> np.ndarray:
+        gram = np.repeat(self.grams, np.diff(self.offsets))
+        return (gram << 32) | self.postings.astype(np.int64)
+
+    def extend(self, texts: List[str]) -> "TrigramIndex":
+        """This index plus `texts` as the rows that follow it."""
+        tail = TrigramIndex.build(texts, first_row=self.n_rows)
+        stop = _sorted_unique(np.concatenate((self.stop, tail.stop)))
+        key = np.sort(np.concatenate((self._keys(), tail._keys())))
+        return TrigramIndex._from_keys(key, stop, tail.n_rows)
+
+    def candidates(self, query: str) -> Optional[np.ndarray]:
+        """Sorted row ids that may contain `query`; None when the index can't narrow it."""
+        try:
+            raw = np.frombuffer(query.encode("ascii"), dtype=np.uint8)
+        except UnicodeEncodeError:
+            return np.empty(0, dtype=np.int32)      # texts are ASCII: nothing can match
+        if len(raw) < 3:
+            return None
+        wanted = np.unique(_grams(raw))
+        wanted = wanted[~np.isin(wanted, self.stop)]
+        if not len(wanted):
+            return None
+        pos = np.searchsorted(self.grams, wanted)
+        if (pos >= len(self.grams)).any() or (self.grams[np.minimum(pos, len(self.grams) - 1)] != wanted).any():
+            return np.empty(0, dtype=np.int32)      # some gram occurs nowhere
+        lists = sorted((self.postings[self.offsets[p]:self.offsets[p + 1]] for p in pos), key=len)
+        rows = lists[0]
+        for other in lists[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+
+def _texts(records) -> List[str]:
+    return [json.dumps(r).lower() for r in records]
+
+def _series(texts: List[str]) -> pd.Series:
+    try:
+        return pd.Series(texts, dtype="string[pyarrow]")
+    except (ImportError, TypeError):
+        return pd.Series(texts, dtype=object)
+
+
+def search_text(table: Table) -> pd.Series:
+    """Per-record search haystack: the record's JSON, lowercased (built once per version)."""
+    return table.cached("search_text", lambda base: _series(_texts(base.records)))
+
+
+def _index(table: Table) -> TrigramIndex:
+    return table.cached("search_index", lambda base: TrigramIndex.build(search_text(base).tolist()))
+
+
+# appended rows (incremental reload) extend the text and index instead of rebuilding them
+register_extender("search_text", lambda old, table, start, records:
+                  pd.concat([old, _series(_texts(records))], ignore_index=True))
+register_extender("search_index", lambda old, table, start, records: old.extend(_texts(records)))
+
+
+def search_rows(table: Table, query: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Base-table row ids whose text contains `query`.
+
+    `rows` (sorted base row ids) restricts the answer to rows that are
+    still in play; without an index hit it is also what gets scanned.
+    """
+    texts = search_text(table)
+    cand = _index(table).candidates(query)
+    if cand is not None:
+        if rows is not None:
+            cand = cand[np.isin(cand, rows)]
+        if len(query) == 3:
+            return cand.astype(np.intp)     # the gram is the query itself
+        rows = cand
+    elif rows is None:
+        rows = np.arange(len(texts))
+    if not len(rows):
+        return np.asarray(rows, dtype=np.intp)
+    hit = texts.iloc[rows].str.contains(query, regex=False).to_numpy(dtype=bool, na_value=False)
+    return np.asarray(rows, dtype=np.intp)[hit]
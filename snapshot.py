@@ -0,0 +1,197 @@
+# graphics/snapshot.py
+"""
+On-disk column store for the typed Tables, kept next to the JSON exports.
+
+Parsing a large JSON export is the bulk of a cold start. After a dataset has
+been parsed once, its columns are written to a directory named after the
+export and the hash of its bytes (graphics.incremental.source_state):
+
+    <export>.columns/<hash>/meta.json          rows, dtypes, report
+    <export>.columns/<hash>/<field>.col        the column, raw little-endian values
+    <export>.columns/<hash>/<field>.has        key-presence mask (one byte per row)
+    <export>.columns/<hash>/<field>.cats       label values, JSON text of each, concatenated
+    <export>.columns/<hash>/<field>.offsets    int64 offsets into .cats (n + 1 entries)
+    <export>.columns/<hash>/derived/<key>.<part>.bin|.json
+                                               record-derived data, see below
+
+Loading memory-maps the column files read-only, so every server process on
+the host shares the same page-cache pages instead of holding its own copy.
+A rewritten export gets a new hash, hence a new directory; stale ones are
+removed once the new one is in place.
+
+Besides the columns, the store keeps the record-derived data the default
+page reads (register_stored): the globe's address index and the flattened
+columns of the details tables. Array parts are memory-mapped like the
+columns, JSON parts are read on first use. The raw records themselves are
+only parsed from the JSON when another record-level feature (search)
+asks for them.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from graphics.columnar import Table
+
+__all__ = ["FORMAT", "snapshot_path", "register_stored", "save_snapshot", "load_snapshot"]
+
+FORMAT = 5                      # bump when the layout below, or what the columns hold, changes
+
+# Derived data (Table.cached keys) kept in the store with the columns:
+#     dump(value) -> {part: ndarray, or a JSON-serialisable value}
+#     load(table, parts) -> value, with parts[part] read on first access
+_STORED: Dict[str, Tuple[Callable[[Any], Dict[str, Any]], Callable[[Table, "_Parts"], Any]]] = {}
+
+def register_stored(key: str, dump: Callable[[Any], Dict[str, Any]],
+                    load: Callable[[Table, "_Parts"], Any]) -> None:
+    _STORED[key] = (dump, load)
+
+
+def snapshot_path(path: str, digest: str) -> str:
+    """Column-store directory of the export at `path` with content hash `digest`."""
+    return os.path.join(os.path.splitext(path)[0] + ".columns", digest)
+
+
+# ---------- strings ----------
+def _pack_strings(values: List[Any]) -> Tuple[bytes, np.ndarray]:
+    parts = [json.dumps(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(p) for p in parts], out=offsets[1:])
+    return b"".join(parts), offsets
+
+def _unpack_strings(data: bytes, offsets: np.ndarray) -> List[Any]:
+    return [json.loads(data[a:b]) for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+def _map(path: str, dtype: str, rows: int) -> np.ndarray:
+    if not rows:
+        return np.empty(0, dtype=dtype)         # an empty file can't be mapped
+    # plain ndarray over the mapping: slices and masks behave like any other column
+    return np.memmap(path, dtype=dtype, mode="r", shape=(rows,)).view(np.ndarray)
+
+
+class _Parts:
+    """The stored parts of one derived value, each read from its file on first access."""
+
+    def __init__(self, folder: str, key: str, spec: Dict[str, Any]):
+        self._folder = folder
+        self._key = key
+        self._spec = spec                       # part -> [dtype, length], or "json"
+
+    def __contains__(self, part: str) -> bool:
+        return part in self._spec
+
+    def __getitem__(self, part: str) -> Any:
+        spec = self._spec[part]
+        path = os.path.join(self._folder, f"{self._key}.{part}")
+        if spec == "json":
+            with open(path + ".json", encoding="utf-8") as f:
+                return json.load(f)
+        return _map(path + ".bin", spec[0], spec[1])
+
+
+def _write_derived(table: Table, folder: str) -> Dict[str, Any]:
+    with table.base._lock:
+        derived = {k: v for k, v in table.base._derived.items() if k in _STORED}
+    if not derived:
+        return {}
+    os.makedirs(folder)
+    specs = {}
+    for key, value in derived.items():
+        spec = specs[key] = {}
+        for part, data in _STORED[key][0](value).items():
+            path = os.path.join(folder, f"{key}.{part}")
+            if isinstance(data, np.ndarray):
+                data = np.ascontiguousarray(data, dtype=data.dtype.newbyteorder("<"))
+                data.tofile(path + ".bin")
+                spec[part] = [data.dtype.str, len(data)]
+            else:
+                with open(path + ".json", "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                spec[part] = "json"
+    return specs
+
+
+# ---------- store ----------
+def _write(table: Table, folder: str, meta: Dict[str, Any]) -> None:
+    base = table.base
+    os.makedirs(folder)
+    dtypes = {}
+    for field, column in base._columns.items():
+        column = np.ascontiguousarray(column, dtype=column.dtype.newbyteorder("<"))
+        column.tofile(os.path.join(folder, field + ".col"))
+        np.ascontiguousarray(base._present[field], dtype=bool).tofile(os.path.join(folder, field + ".has"))
+        dtypes[field] = column.dtype.str
+    for field, cats in base._categories.items():
+        data, offsets = _pack_strings(cats)
+        with open(os.path.join(folder, field + ".cats"), "wb") as f:
+            f.write(data)
+        offsets.astype("<i8").tofile(os.path.join(folder, field + ".offsets"))
+    derived = _write_derived(table, os.path.join(folder, "derived"))
+    with open(os.path.join(folder, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({**meta, "dtypes": dtypes, "labels": list(base._categories), "derived": derived}, f)
+
+
+def save_snapshot(table: Table, path: str, digest: str, report: Dict[str, Any]) -> bool:
+    """
+    Write `table`'s columns, and its derived data with a registered way to
+    store it, for the export at `path`; False when it can't be saved.
+    """
+    folder = snapshot_path(path, digest)
+    if os.path.isdir(folder):
+        return True
+    meta = {"format": FORMAT, "name": table.name, "source_hash": digest, "rows": len(table.base),
+            "malformed": report.get("malformed", 0)}
+    tmp = f"{folder}.{os.getpid()}.tmp"
+    try:
+        _write(table, tmp, meta)
+        os.rename(tmp, folder)                  # readers never see a half-written store
+    except (OSError, TypeError, ValueError):    # disk trouble, or labels JSON can't carry
+        shutil.rmtree(tmp, ignore_errors=True)
+        return os.path.isdir(folder)            # another process may have won the race
+    # older versions of this export; processes still mapping them keep their pages
+    root = os.path.dirname(folder)
+    for entry in os.listdir(root):
+        if entry != digest and "." not in entry:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return True
+
+
+def load_snapshot(path: str, digest: str, name: str,
+                  records_loader: Callable[[int], Callable[[], List[Dict[str, Any]]]]
+                  ) -> Optional[Tuple[Table, Dict[str, Any]]]:
+    """
+    (table, report) memory-mapped from the store of the export at `path`
+    with hash `digest`, or None when there is no usable store yet.
+
+    `records_loader(n_rows)` supplies the table's deferred record parse.
+    """
+    folder = snapshot_path(path, digest)
+    try:
+        with open(os.path.join(folder, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT or meta.get("name") != name or meta.get("source_hash") != digest:
+            return None
+        rows = meta["rows"]
+        columns, present, categories = {}, {}, {}
+        for field, dtype in meta["dtypes"].items():
+            columns[field] = _map(os.path.join(folder, field + ".col"), dtype, rows)
+            present[field] = _map(os.path.join(folder, field + ".has"), "|b1", rows)
+        for field in meta["labels"]:
+            offsets = np.fromfile(os.path.join(folder, field + ".offsets"), dtype="<i8")
+            with open(os.path.join(folder, field + ".cats"), "rb") as f:
+                categories[field] = _unpack_strings(f.read(), offsets)
+    except Exception:                           # missing, unreadable or truncated: rebuild from JSON
+        return None
+    table = Table(name, None, columns, present, categories, version=digest, load_records=records_loader(rows))
+    for key, spec in meta.get("derived", {}).items():
+        if key in _STORED:
+            try:
+                table._derived[key] = _STORED[key][1](table, _Parts(os.path.join(folder, "derived"), key, spec))
+            except Exception:                   # rebuilt on demand instead
+                pass
+    report = {"records": rows, "malformed": meta.get("malformed", 0), "error": None}
+    return table, report
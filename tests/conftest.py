@@ -0,0 +1,86 @@
+# tests/conftest.py
+"""
+The repository root is the `graphics` package (modules import each other
+as graphics.xxx), so register it under that name before the tests import it.
+Also provides export-like sample datasets shared by the tests.
+"""
+import datetime as dt
+import importlib.util
+import pathlib
+import random
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+if "graphics" not in sys.modules or not hasattr(sys.modules["graphics"], "__path__"):
+    spec = importlib.util.spec_from_file_location("graphics", ROOT / "__init__.py",
+                                                  submodule_search_locations=[str(ROOT)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["graphics"] = module
+    spec.loader.exec_module(module)
+
+
+SOURCES = ["Google", "Referral", "Facebook", "", None, "Yelp"]
+STATUSES = ["scheduled", "complete", "in progress", "unscheduled", None, "canceled"]
+OFFSETS = ["Z", "", "-05:00", "+05:30", "-0400"]
+
+
+def make_datasets(n=600, seed=1, years=3):
+    """Export-like records of the four datasets: mixed schemas, offsets, missing and odd values."""
+    rng = random.Random(seed)
+    start = dt.datetime(2022, 1, 1)
+
+    def ts(i):
+        if i % 23 == 5:
+            return rng.choice([None, "", "not a date"])
+        d = start + dt.timedelta(minutes=rng.randrange(years * 365 * 24 * 60))
+        if i % 7 == 0:
+            d = d.replace(hour=0, minute=0, second=0)
+        return d.strftime("%Y-%m-%dT%H:%M:%S") + rng.choice(OFFSETS)
+
+    def addr():
+        return {"city": "X", "state": rng.choice(["CA", "Texas", "ny", None]), "zip": f"{rng.randrange(10000, 99999)}",
+                "country": rng.choice(["US", "USA", "Canada", None])}
+
+    customers = [{"id": f"cus_{i}", "first_name": rng.choice(["Ann", "Bob"]), "email": f"u{i}@x.com",
+                  "lead_source": rng.choice(SOURCES), "created_at": ts(i), "updated_at": ts(i),
+                  "addresses": [addr() for _ in range(rng.randrange(3))]} for i in range(n)]
+    customers[3].pop("lead_source")
+    jobs = [{"id": f"job_{i}", "description": rng.choice(["Repair", "Install", "Maint", None]),
+             "work_status": rng.choice(STATUSES), "total_amount": rng.choice([100, 250.5, None, "300"]),
+             "created_at": ts(i), "updated_at": ts(i),
+             "customer": {"id": f"cus_{i}", "lead_source": rng.choice(SOURCES)}, "address": addr()} for i in range(n)]
+    jobs[0]["customer"] = {}
+    jobs[1]["status"] = "canceled"
+    invoices = []
+    for i in range(n):
+        r = {"id": f"inv_{i}", "status": rng.choice(["paid", "open", "Paid ", "void", None]),
+             "amount": rng.choice([100.0, 50, None]), "invoice_date": ts(i), "updated_at": ts(i),
+             "customer": {"name": rng.choice(["A", "B"])}}
+        k = i % 4
+        if k == 0:
+            r["due_amount"] = rng.choice([0, 25, None])
+        elif k == 1:
+            r["amount_paid"], r["total"] = 40, 80
+        elif k == 2:
+            r["balance"] = "12.5"
+        invoices.append(r)
+    estimates = [{"id": f"est_{i}", "work_status": rng.choice(STATUSES), "created_at": ts(i),
+                  "options": [{"status": "approved"}]} for i in range(n // 2)]
+    return {"invoices": invoices, "jobs": jobs, "customers": customers, "estimates": estimates}
+
+
+@pytest.fixture(scope="session")
+def datasets():
+    """make_datasets() records; tests must not mutate them."""
+    return make_datasets()
+
+
+@pytest.fixture(scope="session")
+def tables(datasets):
+    """The datasets as Tables, in load_data order (invoices, jobs, customers, estimates)."""
+    from graphics.columnar import build_table
+    return tuple(build_table(name, datasets[name], version=name) for name in
+                 ("invoices", "jobs", "customers", "estimates"))
@@ -0,0 +1,86 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from graphics import chart_data
+from graphics.chart_data import CHARTS, chart_datasets
+from graphics.columnar import NAT
+from graphics.data_loader import apply_filters
+from graphics.rollup import dashboard_summary
+
+RANGES = [
+    (None, None),
+    (dt.date(2023, 3, 1), dt.date(2023, 6, 1)),         # daily points
+    (dt.date(2022, 2, 1), dt.date(2023, 6, 30)),        # weekly buckets
+    (dt.date(2021, 1, 1), dt.date(2026, 1, 1)),         # monthly buckets
+]
+
+
+def _filters(date_from, date_to, **labels):
+    return {"date_from": date_from, "date_to": date_to, "search": "", **labels}
+
+
+@pytest.mark.parametrize("date_from,date_to", RANGES)
+@pytest.mark.parametrize("labels", [{}, {"lead_sources": ["Google", "Unknown"], "job_statuses": ["complete"]}])
+def test_cube_path_matches_row_path(tables, date_from, date_to, labels):
+    filters = _filters(date_from, date_to, **labels)
+    summary = dashboard_summary(*tables, filters)
+    assert summary is not None
+    rows = chart_datasets(*apply_filters(*tables, filters))
+    for name in CHARTS:
+        pd.testing.assert_frame_equal(summary[1][name], rows[name], check_exact=False, obj=name)
+        assert summary[1][name].attrs == rows[name].attrs, name
+
+
+def test_trend_buckets_keep_the_daily_total(tables, monkeypatch):
+    totals = {}
+    for points, bucket in ((10_000, "day"), (200, "week"), (5, "month")):   # the data spans three years
+        monkeypatch.setattr(chart_data, "TREND_MAX_POINTS", points)
+        charts = chart_datasets(*tables, charts=("revenue_trend", "leads_trend"))
+        assert charts["revenue_trend"].attrs["bucket"] == charts["leads_trend"].attrs["bucket"] == bucket
+        totals.setdefault("revenue", charts["revenue_trend"]["revenue"].sum())
+        totals.setdefault("leads", charts["leads_trend"]["leads"].sum())
+        assert charts["revenue_trend"]["revenue"].sum() == pytest.approx(totals["revenue"])
+        assert charts["leads_trend"]["leads"].sum() == totals["leads"]
+
+
+def test_trends_cover_dated_rows_only(tables):
+    invoices, _, customers, _ = tables
+    charts = chart_datasets(*tables, charts=("revenue_trend", "leads_trend"))
+    assert charts["revenue_trend"]["revenue"].sum() == pytest.approx(np.nansum(invoices.col("amount")[invoices.times() != NAT]))
+    assert charts["leads_trend"]["leads"].sum() == int((customers.times() != NAT).sum())
+
+
+def _baseline_counts(records, field, column):
+    """The per-chart code's jobs_status / leads_by_source: only missing labels become "Unknown"."""
+    df = pd.DataFrame(records)
+    if df.empty or field not in df:
+        return pd.DataFrame()
+    out = df[field].fillna("Unknown").value_counts().reset_index()
+    out.columns = [column, "count"]
+    return out
+
+
+@pytest.mark.parametrize("drop_sources", [False, True])
+def test_label_counts_keep_empty_labels(datasets, drop_sources):
+    from graphics.columnar import build_table
+    records = {name: [dict(r) for r in recs] for name, recs in datasets.items()}
+    if drop_sources:
+        for rec in records["customers"]:
+            rec.pop("lead_source", None)
+    tables = [build_table(name, records[name]) for name in ("invoices", "jobs", "customers", "estimates")]
+    expected = {"jobs_status": _baseline_counts(records["jobs"], "work_status", "status"),
+                "leads_by_source": _baseline_counts(records["customers"], "lead_source", "source")}
+    assert expected["leads_by_source"].empty == drop_sources
+    if not drop_sources:
+        assert "" in set(expected["leads_by_source"]["source"])
+    rows = chart_datasets(*tables, charts=tuple(expected))
+    cubes = dashboard_summary(*tables, None, charts=tuple(expected))[1]
+    for name, frame in expected.items():
+        for got in (rows[name], cubes[name]):
+            if frame.empty:
+                assert got.empty, name
+            else:
+                pd.testing.assert_frame_equal(got, frame, check_dtype=False, obj=name)
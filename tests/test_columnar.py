@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from graphics.columnar import NAT, build_table, parse_times
+
+
+def _baseline(value):
+    """The sidebar's original per-record parse: the offset is dropped, not applied."""
+    t = pd.to_datetime(value, errors="coerce")
+    if pd.isna(t):
+        return NAT
+    return (t.tz_localize(None) if t.tzinfo is not None else t).as_unit("ns").value
+
+
+def test_parse_times_keeps_wall_clock_time():
+    values = ["2025-02-28T21:00:00-05:00", "2025-02-28T21:00:00+0530", "2025-02-28T21:00:00.250Z",
+              "2025-02-28T21:00:00", "2025-02-28", "2025-03-09T03:30:00-04:00", "March 3 2025 10:00",
+              None, "", "not a date", 1_700_000_000]
+    assert parse_times(values).tolist() == [_baseline(v) for v in values]
+
+
+def test_parse_times_without_strings():
+    assert parse_times([]).tolist() == []
+    assert parse_times([None, None]).tolist() == [NAT, NAT]
+    assert parse_times([5]).tolist() == [5]
+
+
+def test_offset_stays_on_its_local_day():
+    table = build_table("customers", [{"id": 1, "created_at": "2025-02-28T21:00:00-05:00"}])
+    day = table.times()[0] // (86_400 * 10**9)
+    assert np.datetime64(int(day), "D") == np.datetime64("2025-02-28")
+
+
+def _labels(table, field):
+    return [table.categories(field)[c] if c >= 0 else None for c in table.col(field)]
+
+
+def test_unhashable_label_keeps_the_other_values():
+    records = [{"id": 1, "work_status": 0}, {"id": 2, "work_status": ["a"]}, {"id": 3, "work_status": "0"},
+               {"id": 4, "work_status": None}]
+    table = build_table("jobs", records)
+    assert _labels(table, "work_status") == [0, "['a']", "0", None]
+
+
+def test_labels_do_not_depend_on_chunking():
+    records = [{"id": i, "work_status": [i] if i % 7 == 0 else i % 3} for i in range(30)]
+    whole = build_table("jobs", records)
+    chunked = build_table("jobs", records, chunk_rows=4)
+    assert _labels(whole, "work_status") == _labels(chunked, "work_status")
+    assert _labels(chunked, "work_status")[1] == 1
+
+
+def test_columns_only_builder_matches():
+    from graphics.columnar import TableBuilder
+    records = [{"id": i, "created_at": f"2025-01-{1 + i % 28:02d}", "total_amount": i, "work_status": "x" * (i % 3),
+                "customer": {"lead_source": "ads" if i % 2 else None}} for i in range(40)]
+    kept, bare = TableBuilder("jobs"), TableBuilder("jobs", keep_records=False)
+    for start in range(0, 40, 16):
+        kept.append(records[start:start + 16])
+        bare.append(records[start:start + 16])
+    assert bare.records == []
+    a, b = kept.finish(), bare.finish(load_records=lambda: records)
+    assert len(b) == 40 and not b.records_loaded
+    for field in a._columns:
+        assert np.array_equal(a._columns[field], b._columns[field])
+        assert np.array_equal(a._present[field], b._present[field])
+    assert a._categories == b._categories
+    assert b.records == records
+
+
+def test_derived_data_built_while_streaming(datasets):
+    from graphics.columnar import TableBuilder
+    from graphics.flat_frame import flat_frame
+    from graphics.geo_index import geo_counts
+
+    def no_records():
+        raise AssertionError("records parsed")
+
+    for name, records in datasets.items():
+        builder = TableBuilder(name, keep_records=False, derive=("geo_addresses", "flat_schema", "flat_columns"))
+        for start in range(0, len(records), 37):
+            builder.append(records[start:start + 37])
+        streamed, fresh = builder.finish(load_records=no_records), build_table(name, records)
+        for rows in (None, np.arange(5, len(records), 4)):
+            a, b = (streamed, fresh) if rows is None else (streamed.take(rows), fresh.take(rows))
+            pd.testing.assert_frame_equal(flat_frame(a), flat_frame(b))
+            for level in ("country", "state", "zip3"):
+                assert geo_counts(a, level) == geo_counts(b, level)
+        assert not streamed.records_loaded
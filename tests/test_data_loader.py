@@ -0,0 +1,123 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from graphics import data_loader
+from graphics.columnar import build_table
+from graphics.flat_frame import flat_frame
+from graphics.geo_index import geo_counts
+
+
+@pytest.fixture
+def exports(tmp_path, monkeypatch):
+    """Small exports in a temporary data folder, with a fresh dataset store."""
+    for name, fname in data_loader.FILES.items():
+        records = [{"id": i, "created_at": "2025-03-0%dT10:00:00" % (1 + i % 9), "amount": i} for i in range(50)]
+        (tmp_path / fname).write_text(json.dumps(records), encoding="utf-8")
+    monkeypatch.setattr(data_loader, "DATA_FOLDER", str(tmp_path))
+    monkeypatch.setattr(data_loader, "USE_SNAPSHOTS", False)
+    monkeypatch.setattr(data_loader, "_STORE", {})
+    monkeypatch.setattr(data_loader, "_REPORTS", {})
+    monkeypatch.setattr(data_loader, "_STORE_STATS", {"hits": 0, "misses": 0, "incremental": 0})
+    return tmp_path
+
+
+def test_cold_start_parses_each_file_once(exports, monkeypatch):
+    parsed = []
+    read_source = data_loader._read_source
+    gate = threading.Event()
+
+    def slow_read_source(name, path, previous):
+        parsed.append(name)
+        gate.wait(5)            # hold the first load until every session asks for the file
+        return read_source(name, path, previous)
+
+    monkeypatch.setattr(data_loader, "_read_source", slow_read_source)
+    results = []
+    sessions = [threading.Thread(target=lambda: results.append(data_loader.load_data())) for _ in range(4)]
+    for t in sessions:
+        t.start()
+    threading.Timer(0.3, gate.set).start()
+    for t in sessions:
+        t.join(10)
+
+    assert sorted(parsed) == sorted(data_loader.FILES)
+    assert len(results) == 4
+    for tables in results[1:]:
+        assert all(a is b for a, b in zip(tables, results[0]))
+    assert data_loader.cache_stats()["misses"] == 4
+
+
+def test_failed_load_lets_the_next_caller_retry(exports, monkeypatch):
+    read_source = data_loader._read_source
+    calls = []
+
+    def flaky(name, path, previous):
+        calls.append(name)
+        if len(calls) == 1:
+            raise OSError("disk went away")
+        return read_source(name, path, previous)
+
+    monkeypatch.setattr(data_loader, "_read_source", flaky)
+    with pytest.raises(OSError):
+        data_loader.load_table("jobs")
+    assert len(data_loader.load_table("jobs")) == 50
+    assert calls == ["jobs", "jobs"]
+
+
+def test_snapshot_backed_tables_parse_records_on_first_use(exports, monkeypatch):
+    monkeypatch.setattr(data_loader, "USE_SNAPSHOTS", True)
+    data_loader.load_data()                         # parses the exports, writes their column stores
+    monkeypatch.setattr(data_loader, "_STORE", {})  # as a fresh server process would
+    tables = data_loader.load_data()
+    assert not any(t.records_loaded for t in tables)
+    jobs = tables[1]
+    assert len(jobs) == 50 and jobs.total("total_amount") == 0.0
+    # what the Graphics page reads first was stored with the columns
+    for table in tables:
+        geo_counts(table, "state")
+        assert len(flat_frame(table.take([1, 2]))) == 2
+    assert not any(t.records_loaded for t in tables)
+    assert jobs[3]["id"] == 3 and jobs.records_loaded
+
+
+def test_worker_parse_hands_back_the_first_render_data(exports, monkeypatch, datasets):
+    for name, fname in data_loader.FILES.items():
+        (exports / fname).write_text(json.dumps(datasets[name]), encoding="utf-8")
+    monkeypatch.setattr(data_loader, "USE_SNAPSHOTS", True)
+    monkeypatch.setattr(data_loader, "PARSE_PROCESS_MIN_BYTES", 0)
+    pool = ThreadPoolExecutor(1)      # stands in for the process pool: same function, same store
+    monkeypatch.setattr(data_loader, "_parse_pool", lambda: pool)
+    parsed, parse_to_snapshot = [], data_loader._parse_to_snapshot
+    monkeypatch.setattr(data_loader, "_parse_to_snapshot",
+                        lambda *args: parsed.append(args[0]) or parse_to_snapshot(*args))
+
+    def no_records(path):
+        raise AssertionError("records parsed in the serving process")
+
+    monkeypatch.setattr(data_loader, "_safe_load", no_records)
+    tables = data_loader.load_data()
+    assert sorted(parsed) == sorted(data_loader.FILES)
+    for table in tables:
+        assert len(table) == len(datasets[table.name])
+        geo_counts(table.take(range(0, len(table), 2)), "zip3")
+        assert list(flat_frame(table).columns) == list(flat_frame(build_table(table.name, datasets[table.name])).columns)
+    assert not any(t.records_loaded for t in tables)
+    pool.shutdown()
+
+
+def test_parse_keeps_no_records(exports):
+    text = (exports / "jobs_data.json").read_text(encoding="utf-8")
+    (exports / "jobs_data.json").write_text(text[:-1] + ', 12.5e3, "x", {"id": 50}]', encoding="utf-8")
+    jobs = data_loader.load_table("jobs")
+    assert len(jobs) == 51 and not jobs.records_loaded
+    assert data_loader.load_reports()["jobs"]["malformed"] == 2
+    assert jobs[50] == {"id": 50} and jobs.records_loaded
+
+
+def test_get_kpis_matches_metrics(exports):
+    from graphics import metrics
+    tables = data_loader.load_data()
+    assert data_loader.get_kpis(*tables) == metrics.get_kpis(*tables)
@@ -0,0 +1,108 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from graphics import details_charts
+from graphics.details_charts import _export, _search, _sort_order
+from graphics.flat_frame import flat_frame
+
+QUERIES = ["JOB_1", "^inv_1", "paid|open", "nan", "none", "true", "100.0", "2023-0[1-3]", r"\.5$"]
+
+
+def _row_wise(df, query):
+    """The original search: every row's cells as text, matched as a case-insensitive pattern."""
+    return df[df.apply(lambda r: r.astype(str).str.contains(query, case=False, na=False).any(), axis=1)]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_the_row_wise_search(tables, query):
+    for table in tables:
+        for view in (table, table.take(np.arange(1, len(table), 3))):
+            df = flat_frame(view)
+            expected = _row_wise(df, query)
+            pd.testing.assert_frame_equal(_search(df, query, view), expected)
+            pd.testing.assert_frame_equal(_search(df, query), expected)
+
+
+def test_invalid_pattern_is_matched_as_text():
+    df = pd.DataFrame({"a": ["x[1", "y"], "b": [1, 2]})
+    assert _search(df, "[1").index.tolist() == [0]
+
+
+def test_texts_are_built_once_per_dataset_version(tables):
+    jobs = tables[1]
+    views = [jobs.take(np.arange(start, len(jobs), 5)) for start in range(5)]
+    _search(flat_frame(jobs), "repair", jobs)
+    entries = details_charts._TEXTS.stats()["entries"]
+    for view in views:                      # other filters: same texts, other rows
+        df = flat_frame(view)
+        pd.testing.assert_frame_equal(_search(df, "repair", view), _row_wise(df, "repair"))
+    assert details_charts._TEXTS.stats()["entries"] == entries
+
+
+def _stable_order(values, ascending):
+    """Positions sorted by value (by text when types don't compare), ties in row order, missing last."""
+    present = [i for i, missing in enumerate(values.isna()) if not missing]
+    try:
+        order = sorted(present, key=lambda i: values[i], reverse=not ascending)
+    except TypeError:
+        order = sorted(present, key=lambda i: str(values[i]), reverse=not ascending)
+    return order + [i for i, missing in enumerate(values.isna()) if missing]
+
+
+@pytest.mark.parametrize("ascending", [True, False])
+def test_sort_order_is_a_stable_permutation(tables, ascending):
+    mixed = pd.DataFrame({"mixed": [3, "a", None, [1], np.nan, {"b": 1}, 2, "a", [1]]}, index=range(10, 19))
+    frames = [mixed] + [flat_frame(t.take(np.arange(2, len(t), 3))) for t in tables]
+    for df in frames:
+        for column in df.columns:
+            perm = _sort_order(df, column, ascending)
+            assert sorted(perm) == list(range(len(df))), column
+            assert perm.tolist() == _stable_order(df[column].reset_index(drop=True), ascending), column
+
+
+def test_sort_order_is_cached_per_key(tables):
+    df = flat_frame(tables[0])
+    hits = details_charts._ORDERS.stats()["hits"]
+    first = _sort_order(df, "amount", False, ("invoices", "sort-test"))
+    again = _sort_order(df, "amount", False, ("invoices", "sort-test"))
+    assert details_charts._ORDERS.stats()["hits"] == hits + 1
+    assert np.array_equal(first, again)
+
+
+def _export_frames(tables):
+    views = [flat_frame(t.take(np.arange(1, len(t), 2))) for t in tables]
+    return views + [views[0].iloc[:0], views[1].iloc[:3]]
+
+
+def test_chunked_csv_matches_one_shot(tables, monkeypatch):
+    monkeypatch.setattr(details_charts, "EXPORT_CHUNK_ROWS", 7)
+    for df in _export_frames(tables):
+        expected = df.to_csv(index=False).encode("utf-8")
+        assert _export(df, "CSV") == expected
+        assert gzip.decompress(_export(df, "CSV (gzip)")) == expected
+
+
+@pytest.mark.skipif(not details_charts._HAS_PARQUET, reason="no Parquet engine")
+def test_parquet_matches_one_shot(tables):
+    for df in _export_frames(tables):
+        buf = io.BytesIO()
+        try:
+            df.to_parquet(buf, index=False)
+        except Exception:           # nested values of mixed shape are exported as text
+            buf = io.BytesIO()
+            df.astype({c: str for c in df.columns if df[c].dtype == object}).to_parquet(buf, index=False)
+        pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(_export(df, "Parquet"))),
+                                      pd.read_parquet(io.BytesIO(buf.getvalue())))
+
+
+def test_repeated_exports_are_cached(tables):
+    df = flat_frame(tables[1])
+    key = ("jobs", "export-test")
+    first = _export(df, "CSV (gzip)", key)
+    hits = details_charts._EXPORTS.stats()["hits"]
+    assert _export(df, "CSV (gzip)", key) is first
+    assert details_charts._EXPORTS.stats()["hits"] == hits + 1
@@ -0,0 +1,20 @@
+import pandas as pd
+
+from graphics.figure_cache import FIGURES, cached_figure, figure_stats
+
+
+def test_figure_built_once_per_content_and_style():
+    builds = []
+
+    def build(df, height=100):
+        builds.append(height)
+        return {"rows": len(df), "height": height}
+
+    df = pd.DataFrame({"x": [1, 2, 3]})
+    first = cached_figure("test_chart", df, build)
+    assert cached_figure("test_chart", df.copy(), build) is first
+    cached_figure("test_chart", df, build, height=200)
+    cached_figure("test_chart", df.assign(x=[1, 2, 4]), build)
+    assert builds == [100, 200, 100]
+    assert figure_stats()["test_chart"]["builds"] == 3
+    assert FIGURES.stats()["bytes"] > 0
@@ -0,0 +1,100 @@
+import datetime as dt
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+
+from graphics.filter_engine import filter_rows, normalize_filters
+
+DATASETS = ("invoices", "jobs", "customers")
+TIME_FIELD = {"invoices": "invoice_date", "jobs": "created_at", "customers": "created_at"}
+
+
+def _to_naive(ts):
+    t = pd.to_datetime(ts, errors="coerce")
+    if pd.isna(t):
+        return pd.NaT
+    try:
+        return t.tz_localize(None)
+    except Exception:
+        return t
+
+
+_PARSED = {}
+
+def _record_time(name, i, record):
+    """_to_naive of a record's timestamp, parsed once across cases."""
+    if (name, i) not in _PARSED:
+        _PARSED[name, i] = _to_naive(record.get(TIME_FIELD[name]))
+    return _PARSED[name, i]
+
+
+def brute_force(datasets, filters):
+    """The original apply_filters, record by record (search over each record's own JSON)."""
+    date_from, date_to = _to_naive(filters.get("date_from")), _to_naive(filters.get("date_to"))
+    search = (filters.get("search") or "").strip().lower()
+    labels = {"jobs": ("work_status", set(filters.get("job_statuses") or [])),
+              "customers": ("lead_source", set(filters.get("lead_sources") or []))}
+    out = {}
+    for name in DATASETS:
+        rows = list(enumerate(datasets[name]))
+        field, allowed = labels.get(name, (None, set()))
+        if allowed:
+            rows = [(i, r) for i, r in rows if (r.get(field) or "Unknown") in allowed]
+        if date_from is not None or date_to is not None:
+            dated = [(i, r, _record_time(name, i, r)) for i, r in rows]
+            rows = [(i, r) for i, r, t in dated if not pd.isna(t)
+                    and (date_from is None or t >= date_from) and (date_to is None or t <= date_to)]
+        if search:
+            rows = [(i, r) for i, r in rows if search in json.dumps(r).lower()]
+        out[name] = [i for i, _ in rows]
+    return out
+
+
+# the sidebar always sends both dates; a missing one filters everything out, as it always did
+RANGES = [(dt.date(2000, 1, 1), dt.date(2030, 1, 1)), (dt.date(2023, 3, 1), dt.date(2023, 6, 1)),
+          (dt.date(2022, 6, 15), dt.date(2022, 6, 15)), (dt.date(2024, 1, 1), dt.date(2023, 1, 1)), (None, None)]
+SEARCHES = ["", "google", "Inst", "cus_1", "2023-03", "x", "\"paid\"", "no such text", "a.b*"]
+LABELS = [{}, {"lead_sources": ["Google", "Unknown"]}, {"job_statuses": ["complete", "canceled"]},
+          {"lead_sources": ["Yelp"], "job_statuses": ["Unknown"]}]
+
+
+def _cases():
+    for (date_from, date_to), search, labels in itertools.product(RANGES, SEARCHES, LABELS):
+        yield {"date_from": date_from, "date_to": date_to, "search": search, **labels}
+
+
+def test_matches_brute_force(datasets, tables):
+    tables = dict(zip(("invoices", "jobs", "customers"), tables))
+    for filters in _cases():
+        got = filter_rows(tables, filters)
+        want = brute_force(datasets, filters)
+        for name in DATASETS:
+            assert got[name].tolist() == want[name], (name, filters)
+
+
+def test_refined_filters_match_fresh_evaluation(tables):
+    tables = dict(zip(("invoices", "jobs", "customers"), tables))
+    steps = [{"date_from": dt.date(2022, 3, 1), "date_to": dt.date(2024, 6, 1), "search": "g"},
+             {"date_from": dt.date(2022, 3, 1), "date_to": dt.date(2024, 6, 1), "search": "go"},
+             {"date_from": dt.date(2023, 1, 1), "date_to": dt.date(2024, 6, 1), "search": "goo",
+              "lead_sources": ["Google", "Yelp"]},
+             {"date_from": dt.date(2023, 1, 1), "date_to": dt.date(2024, 1, 1), "search": "goo",
+              "lead_sources": ["Google"], "job_statuses": ["complete"]},
+             {"date_from": dt.date(2022, 1, 1), "date_to": dt.date(2024, 1, 1), "search": "go"}]
+    previous = None
+    for filters in steps:
+        rows = filter_rows(tables, filters, previous)
+        fresh = filter_rows(tables, filters)
+        for name in DATASETS:
+            assert np.array_equal(rows[name], fresh[name]), (name, filters)
+        previous = (normalize_filters(filters), rows)
+
+
+def test_offset_timestamp_filters_on_its_local_day():
+    from graphics.columnar import build_table
+    customers = build_table("customers", [{"id": 1, "created_at": "2025-02-28T21:00:00-05:00"}])
+    inside = filter_rows({"customers": customers}, {"date_from": dt.date(2025, 2, 28), "date_to": dt.date(2025, 3, 1)})
+    outside = filter_rows({"customers": customers}, {"date_from": dt.date(2025, 3, 1), "date_to": dt.date(2025, 6, 1)})
+    assert inside["customers"].tolist() == [0] and outside["customers"].tolist() == []
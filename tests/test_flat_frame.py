@@ -0,0 +1,111 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from graphics.columnar import TableBuilder, build_table
+from graphics.flat_frame import flat_frame, flat_schema
+
+
+def _value(rng, depth):
+    kind = rng.randrange(9 if depth < 2 else 7)
+    if kind == 0:
+        return rng.randrange(-5, 5)
+    if kind == 1:
+        return rng.choice([0.5, 2.25, float("nan")])
+    if kind == 2:
+        return rng.choice(["", "a", "B", "2025-01-01T10:00:00Z"])
+    if kind == 3:
+        return None
+    if kind == 4:
+        return rng.choice([True, False])
+    if kind == 5:
+        return [rng.randrange(3)]
+    if kind == 6:
+        return {}
+    return _record(rng, depth + 1)
+
+
+def _record(rng, depth=0):
+    keys = rng.sample(["a", "b", "c", "d", "x.y"], rng.randrange(5))
+    return {k: _value(rng, depth) for k in keys}
+
+
+def _expected(records):
+    return pd.json_normalize(records, sep=".")
+
+
+def _check(got, records):
+    want = _expected(records)
+    if not len(records):
+        assert got.shape == (0, 0)
+        return
+    pd.testing.assert_frame_equal(got, want)
+
+
+def test_matches_json_normalize():
+    # differential fuzz: whole tables and views (sorted, shuffled, empty) of random nested records
+    for seed in range(400):
+        rng = random.Random(seed)
+        records = [_record(rng) for _ in range(rng.randrange(1, 30))]
+        table = build_table("jobs", records)
+        _check(flat_frame(table), records)
+        for _ in range(3):
+            rows = sorted(rng.sample(range(len(records)), rng.randrange(len(records) + 1)))
+            if rng.random() < 0.3:
+                rng.shuffle(rows)
+            view = table.take(np.array(rows, dtype=np.intp))
+            _check(flat_frame(view), [records[i] for i in rows])
+            if rows:
+                assert flat_schema(view) == list(_expected([records[i] for i in rows]).columns)
+
+
+def test_streamed_columns_match_plucked_ones():
+    # the same fuzz, with schema and columns built chunk by chunk while a columns-only build streams
+    for seed in range(400):
+        rng = random.Random(seed)
+        records = [_record(rng) for _ in range(rng.randrange(1, 30))]
+        builder = TableBuilder("jobs", keep_records=False, derive=("flat_schema", "flat_columns"))
+        step = rng.randrange(1, 8)
+        for start in range(0, len(records), step):
+            builder.append(records[start:start + step])
+        streamed = builder.finish(load_records=lambda: records)
+        _check(flat_frame(streamed), records)
+        rows = np.array(sorted(rng.sample(range(len(records)), rng.randrange(len(records) + 1))), dtype=np.intp)
+        _check(flat_frame(streamed.take(rows)), [records[i] for i in rows])
+        assert not streamed.records_loaded
+
+
+def test_datasets_match_json_normalize(datasets):
+    for name, records in datasets.items():
+        table = build_table(name, records)
+        _check(flat_frame(table), records)
+        rows = np.arange(1, len(records), 5)
+        _check(flat_frame(table.take(rows)), [records[i] for i in rows])
+
+
+def test_projection_keeps_the_given_order_and_drops_absent_columns(datasets):
+    records = datasets["customers"]
+    table = build_table("customers", records)
+    got = flat_frame(table, ["email", "nope", "created_at", "lead_source"])
+    want = _expected(records)[["email", "created_at", "lead_source"]]
+    pd.testing.assert_frame_equal(got, want)
+    assert flat_frame(table, []).shape == (len(records), 0)
+
+
+def test_empty_view_has_no_columns():
+    table = build_table("jobs", [{"id": 1, "a": {"b": 2}}])
+    empty = flat_frame(table.take([]))
+    assert empty.shape == (0, 0) and empty.columns.dtype == object
+
+
+def test_appended_rows_extend_schema_and_columns():
+    head = [{"id": i, "a": i} for i in range(5)]
+    tail = [{"id": 9, "b": {"c": 1}, "a": 2}]
+    table = build_table("jobs", head)
+    flat_frame(table)                                   # schema and columns built on the head
+    builder = TableBuilder("jobs", head=table)
+    builder.append(tail)
+    grown = builder.finish()
+    _check(flat_frame(grown), head + tail)
+    _check(flat_frame(grown.take([5, 0])), [tail[0], head[0]])
@@ -0,0 +1,52 @@
+import random
+
+from graphics.columnar import build_table
+from graphics.geo_index import geo_counts
+
+
+def _baseline_us_count(records):
+    """The globe's original count: own `addresses` entries with a US spelling."""
+    n = 0
+    for rec in records:
+        if "addresses" in rec:
+            for addr in rec.get("addresses") or []:
+                if isinstance(addr, dict) and (addr.get("country") or "").upper() in [
+                        "US", "USA", "UNITED STATES", "UNITED STATES OF AMERICA", "U.S."]:
+                    n += 1
+    return n
+
+
+def _records(n, seed=7):
+    rng = random.Random(seed)
+    countries = ["US", "usa", " US ", "U.S.A.", "United States", "Canada", "", None, "U.S."]
+    out = []
+    for i in range(n):
+        addr = lambda: {"country": rng.choice(countries), "state": rng.choice(["CA", "ny", "Texas", "ZZ", None]),
+                        "zip": rng.choice(["94107", "10001-1234", "7", None])}
+        rec = {"id": i}
+        shape = rng.randrange(5)
+        if shape == 0:
+            rec["addresses"] = [addr() for _ in range(rng.randrange(3))]
+        elif shape == 1:
+            rec["address"] = addr()
+        elif shape == 2:
+            rec["customer"] = {"addresses": [addr()]}
+        elif shape == 3:
+            rec["customer"] = {"address": addr()}
+        out.append(rec)
+    return out
+
+
+def test_country_level_keeps_the_original_count():
+    records = _records(400)
+    table = build_table("customers", records)
+    counts = geo_counts(table, "country")
+    assert dict(counts).get("United States", 0) == _baseline_us_count(records)
+    view = table.take(list(range(0, 400, 3)))
+    assert dict(geo_counts(view, "country")).get("United States", 0) == _baseline_us_count(view.records)
+
+
+def test_state_level_reads_every_address_source():
+    records = [{"id": 1, "address": {"state": "ca"}}, {"id": 2, "customer": {"addresses": [{"state": "CA"}]}},
+               {"id": 3, "addresses": [{"country": "Canada", "state": "CA"}]}]
+    assert geo_counts(build_table("customers", records), "state") == (("CA", 2),)
@@ -0,0 +1,129 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from graphics import incremental
+from graphics.columnar import build_table
+from graphics.flat_frame import flat_frame
+from graphics.geo_index import geo_counts
+from graphics.incremental import reload_table, source_state
+from graphics.search_index import search_rows, search_text
+from graphics.snapshot import load_snapshot, save_snapshot
+
+
+def _write(path, records, indent=1):
+    path.write_text(json.dumps(records, indent=indent), encoding="utf-8")
+
+
+def _reload(path, old, old_state, records, monkeypatch):
+    """reload_table over the rewritten export; also which strategy answered."""
+    used = []
+    appended_bytes, matched = incremental._appended_bytes, incremental._matched
+
+    def spy_bytes(*args):
+        out = appended_bytes(*args)
+        if out is not None:
+            used.append("bytes")
+        return out
+
+    def spy_matched(*args):
+        used.append("matched")
+        return matched(*args)
+
+    monkeypatch.setattr(incremental, "_appended_bytes", spy_bytes)
+    monkeypatch.setattr(incremental, "_matched", spy_matched)
+    state = source_state(str(path), mark=old_state["tail"])
+    loader = lambda n_rows: (lambda: records[:n_rows])
+    table, report = reload_table(old, str(path), old_state, state, {"malformed": 0}, loader, chunk_rows=64)
+    assert table.version == state["digest"] and report["records"] == len(records)
+    return table, (used or ["rows"])[0]
+
+
+def _warm(table):
+    """Derived data with registered extenders, built before the reload."""
+    search_text(table)
+    search_rows(table, "repair")
+    flat_frame(table)
+    geo_counts(table, "state")
+
+
+def _assert_rebuilt(table, records):
+    """`table` decodes to the same values as a table built from scratch over `records`."""
+    fresh = build_table(table.name, records)
+    assert len(table) == len(fresh) and set(table.base._columns) == set(fresh.base._columns)
+    for field in fresh.base._columns:
+        assert np.array_equal(table.has(field), fresh.has(field)), field
+        if field in fresh.base._categories:
+            assert np.array_equal(table.labels(field, None), fresh.labels(field, None)), field
+        else:
+            assert np.array_equal(table.col(field), fresh.col(field),
+                                  equal_nan=fresh.col(field).dtype.kind == "f"), field
+    assert table.records == records
+    assert search_text(table).tolist() == search_text(fresh).tolist()
+    for query in ("repair", "cus_1", "google", "zzz"):
+        assert np.array_equal(search_rows(table, query), search_rows(fresh, query)), query
+    pd.testing.assert_frame_equal(flat_frame(table), flat_frame(fresh))
+    for level in ("country", "state", "zip3"):
+        assert geo_counts(table, level) == geo_counts(fresh, level)
+
+
+@pytest.fixture(params=["customers", "jobs", "invoices"])
+def export(request, tmp_path, datasets):
+    """(path, old table, old state, all records) with 500 records in the old export."""
+    name = request.param
+    records = datasets[name]
+    path = tmp_path / f"{name}_data.json"
+    _write(path, records[:500])
+    old_state = source_state(str(path))
+    old = build_table(name, records[:500], version=old_state["digest"])
+    _warm(old)
+    return path, old, old_state, records
+
+
+def test_appended_bytes(export, monkeypatch):
+    path, old, old_state, records = export
+    _write(path, records)
+    table, used = _reload(path, old, old_state, records, monkeypatch)
+    assert used == "bytes"
+    _assert_rebuilt(table, records)
+
+
+def test_nothing_appended(export, monkeypatch):
+    path, old, old_state, records = export
+    path.write_text(path.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    table, used = _reload(path, old, old_state, records[:500], monkeypatch)
+    assert used == "bytes"
+    _assert_rebuilt(table, records[:500])
+
+
+def test_appended_rows_after_reformatting(export, monkeypatch):
+    path, old, old_state, records = export
+    _write(path, records, indent=None)
+    table, used = _reload(path, old, old_state, records, monkeypatch)
+    assert used == "rows"
+    _assert_rebuilt(table, records)
+
+
+def test_changed_rows(export, monkeypatch):
+    path, old, old_state, records = export
+    changed = [dict(r) for r in records[50:]]              # first rows dropped, the rest reordered
+    changed.reverse()
+    for r in changed[::9]:
+        r["updated_at"] = "2030-01-01T00:00:00Z"
+        r["lead_source"] = "Billboard"                    # a label the old table never saw
+    _write(path, changed)
+    table, used = _reload(path, old, old_state, changed, monkeypatch)
+    assert used == "matched"
+    _assert_rebuilt(table, changed)
+
+
+def test_appended_bytes_to_a_stored_table(export, monkeypatch):
+    path, old, old_state, records = export
+    save_snapshot(old, str(path), old_state["digest"], {})
+    stored, _ = load_snapshot(str(path), old_state["digest"], old.name, lambda n: (lambda: records[:n]))
+    _write(path, records)
+    table, used = _reload(path, stored, old_state, records, monkeypatch)
+    assert used == "bytes" and not table.records_loaded     # records still parsed on first use
+    _assert_rebuilt(table, records)
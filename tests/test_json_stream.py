@@ -0,0 +1,84 @@
+import io
+import json
+import random
+
+from graphics.json_stream import ArrayReader
+
+BLOCKS = [1, 2, 3, 4, 5, 7, 8, 11, 16, 23, 64, 1 << 20]
+BROKEN = ['{"a": tru}', '{"a" 1}', "nul", "1e5x", "-"]
+
+
+def _read(text, block):
+    reader = ArrayReader(io.StringIO(text), block_chars=block)
+    return list(reader), reader.records, reader.malformed
+
+
+def _element(rng):
+    kind = rng.randrange(10)
+    if kind == 0:
+        return rng.choice([7, -12.5, 1.5e-7, 123456789, True, None, "s", [1, {"a": 2}]])
+    return {"id": rng.randrange(1000), "name": rng.choice(["", "ä \"q\" , ] }", "x\\y", "tab\t"]),
+            "nested": {"list": [rng.random(), {"k": [1, 2, {"z": None}]}], "s": ",]"},
+            **({"amount": rng.choice([0, -1.25e3, 10 ** 20])} if rng.random() < 0.5 else {})}
+
+
+def _text(rng, elements):
+    sep = rng.choice([",", ", ", ",\n  ", " ,\r\n"])
+    return rng.choice(["", "\n", "  "]) + "[" + sep.join(json.dumps(e, indent=rng.choice([None, 1])) for e in elements) + "]\n"
+
+
+def test_valid_arrays_match_json_load():
+    for seed in range(60):
+        rng = random.Random(seed)
+        text = _text(rng, [_element(rng) for _ in range(rng.randrange(12))])
+        expected = json.loads(text)
+        records = [e for e in expected if isinstance(e, dict)]
+        for block in BLOCKS:
+            assert _read(text, block) == (records, len(records), len(expected) - len(records)), (seed, block)
+
+
+def test_numbers_cut_by_a_block_boundary_count_once():
+    text = "[1.5e3, -0.25, 12345678, " + json.dumps({"a": 1}) + ", 2e-5]"
+    for block in BLOCKS:
+        assert _read(text, block) == ([{"a": 1}], 1, 4), block
+
+
+def test_broken_elements_are_skipped_and_counted_once():
+    for seed in range(60):
+        rng = random.Random(seed)
+        elements = [_element(rng) for _ in range(rng.randrange(1, 10))]
+        parts = [json.dumps(e) for e in elements]
+        broken = rng.sample(range(len(parts) + 1), rng.randrange(1, 3))
+        for i in sorted(broken, reverse=True):
+            parts.insert(i, rng.choice(BROKEN))
+        text = "[" + ", ".join(parts) + "]"
+        records = [e for e in elements if isinstance(e, dict)]
+        malformed = len(broken) + len(elements) - len(records)
+        for block in BLOCKS:
+            assert _read(text, block) == (records, len(records), malformed), (seed, block, text)
+
+
+def test_truncated_files_keep_the_complete_records():
+    for seed in range(30):
+        rng = random.Random(seed)
+        elements = [_element(rng) for _ in range(rng.randrange(1, 8))]
+        parts = [json.dumps(e, indent=rng.choice([None, 1])) for e in elements]
+        text, ends = "[", []
+        for part in parts:
+            text += part
+            ends.append(len(text))
+            text += ", "
+        for cut in sorted(rng.sample(range(1, len(text)), min(10, len(text) - 1))):
+            results = [_read(text[:cut], block) for block in BLOCKS]
+            assert all(r == results[0] for r in results), (seed, cut)     # whatever the block size
+            records, n, malformed = results[0]
+            complete = [e for e, end in zip(elements, ends) if end <= cut and isinstance(e, dict)]
+            assert records == complete and n == len(complete), (seed, cut)
+            broken = sum(end <= cut and not isinstance(e, dict) for e, end in zip(elements, ends))
+            assert malformed == broken + 1, (seed, cut)                   # the cut element, or the missing "]"
+
+
+def test_not_an_array():
+    for text in ('{"a": 1}', "12", "  "):
+        for block in (1, 3, 1 << 20):
+            assert _read(text, block) == ([], 0, 1 if text.strip() else 0)
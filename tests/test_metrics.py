@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from graphics.columnar import build_table
+from graphics.metrics import CANCELLED_STATUSES, PAID_STATUSES, _lower, get_kpis
+
+NAMES = ("invoices", "jobs", "customers", "estimates")
+
+
+# --- the per-record KPI code the vectorised get_kpis replaced ---
+def _num(v):
+    try:
+        return float(v)
+    except Exception:
+        return 0.0
+
+def _invoice_status(inv):
+    for k in ("status", "invoice_status", "payment_status"):
+        if k in inv:
+            return _lower(inv.get(k))
+    return ""
+
+def _amount_due(inv):
+    for k in ("due_amount", "balance", "amount_due"):
+        if k in inv:
+            return _num(inv.get(k))
+    total = 0.0
+    for k in ("grand_total", "total", "amount"):
+        if k in inv:
+            total = _num(inv.get(k))
+            break
+    paid = 0.0
+    for k in ("amount_paid", "paid_amount"):
+        if k in inv:
+            paid = _num(inv.get(k))
+            break
+    due = total - paid
+    return due if due > 0 else 0.0
+
+def _amount_paid(inv):
+    for k in ("amount_paid", "paid_amount"):
+        if k in inv:
+            return _num(inv.get(k))
+    if _invoice_status(inv) in PAID_STATUSES:
+        for k in ("grand_total", "total", "amount"):
+            if k in inv:
+                return _num(inv.get(k))
+    return 0.0
+
+def _row_wise(invoices, jobs, customers, estimates):
+    jobs_booked = sum(1 for j in jobs if _lower(j.get("status") or j.get("job_status")) not in CANCELLED_STATUSES)
+    if estimates:
+        leads = len(estimates)
+    else:
+        leads = sum(1 for c in customers if c.get("lead_source") or c.get("leadSource"))
+    return {"revenue": sum(_amount_paid(inv) for inv in invoices),
+            "outstanding_balance": sum(_amount_due(inv) for inv in invoices),
+            "jobs_booked": jobs_booked, "leads_count": leads}
+
+
+def _odd_records():
+    """Schemas the sample exports don't cover: other role fields, unparseable amounts, leadSource."""
+    invoices = [{"id": "a", "payment_status": "Settled", "grand_total": "90", "amount": 10},
+                {"id": "b", "invoice_status": "open", "grand_total": "abc", "paid_amount": 5},
+                {"id": "c", "status": None, "invoice_status": "paid", "amount": 7},
+                {"id": "d", "amount_due": "3.5", "paid_amount": "x"},
+                {"id": "e"}]
+    jobs = [{"id": "a", "job_status": "Void"}, {"id": "b", "status": "", "job_status": "cancelled"},
+            {"id": "c", "status": "open", "job_status": "canceled"}, {"id": "d"}]
+    customers = [{"id": "a", "leadSource": "Ads"}, {"id": "b", "lead_source": "", "leadSource": "x"},
+                 {"id": "c", "lead_source": None}, {"id": "d"}]
+    return {"invoices": invoices, "jobs": jobs, "customers": customers, "estimates": []}
+
+
+def _check(records, rows=None):
+    tables = [build_table(name, records[name]) for name in NAMES]
+    if rows is not None:
+        tables = [t.take(rows[rows < len(t)]) for t in tables]
+        records = {name: [records[name][i] for i in t.row_ids()] for name, t in zip(NAMES, tables)}
+    kpis, expected = get_kpis(*tables), _row_wise(*(records[name] for name in NAMES))
+    for key, value in expected.items():
+        assert kpis[key] == (pytest.approx(value) if isinstance(value, float) else value), key
+
+
+@pytest.mark.parametrize("with_estimates", [True, False])
+def test_kpis_match_the_per_record_code(datasets, with_estimates):
+    records = dict(datasets, estimates=datasets["estimates"] if with_estimates else [])
+    _check(records)
+    for step in (3, 7):
+        _check(records, np.arange(1, 600, step))
+
+
+def test_kpis_on_other_invoice_schemas():
+    _check(_odd_records())
+    _check(_odd_records(), np.array([0, 2, 3]))
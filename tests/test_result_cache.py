@@ -0,0 +1,23 @@
+import logging
+
+import numpy as np
+
+from graphics.result_cache import ResultCache
+
+
+def test_lru_eviction_by_bytes():
+    cache = ResultCache(3000)
+    for i in range(4):
+        cache.put(i, np.zeros(100))         # 800 bytes each
+    assert cache.get(0) is None and cache.get(3) is not None
+    assert cache.stats()["bytes"] <= 3000
+
+
+def test_oversize_entry_is_logged_not_stored(caplog):
+    cache = ResultCache(1000)
+    with caplog.at_level(logging.WARNING, logger="graphics.result_cache"):
+        cache.put("big", np.zeros(1000))
+    assert cache.get("big") is None
+    assert cache.stats()["oversize"] == 1
+    assert "not cached" in caplog.text
+
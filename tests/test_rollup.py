@@ -0,0 +1,61 @@
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+from graphics.chart_data import CHARTS
+from graphics.columnar import TableBuilder, build_table
+from graphics.data_loader import apply_filters
+from graphics.metrics import get_kpis
+from graphics.rollup import CUBE_FIELDS, dashboard_summary
+
+FILTERS = [
+    {"date_from": None, "date_to": None},
+    {"date_from": dt.date(2023, 3, 1), "date_to": dt.date(2023, 3, 1)},          # a single day
+    {"date_from": dt.date(2022, 2, 1), "date_to": dt.date(2023, 6, 30)},
+    {"date_from": dt.date(2022, 2, 1), "date_to": dt.date(2024, 12, 31),
+     "lead_sources": ["Google", "Unknown"], "job_statuses": ["complete", "Unknown"]},
+    {"date_from": dt.date(2021, 1, 1), "date_to": dt.date(2026, 1, 1), "lead_sources": ["Yelp"]},
+]
+
+
+def _assert_kpis_equal(a, b):
+    assert a.keys() == b.keys()
+    for key in a:
+        assert a[key] == (pytest.approx(b[key]) if isinstance(b[key], float) else b[key]), key
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("with_estimates", [True, False])
+def test_kpis_match_the_filtered_rows(tables, filters, with_estimates):
+    tables = tables if with_estimates else tables[:3] + (build_table("estimates", []),)
+    filters = {"search": "", **filters}
+    kpis, _ = dashboard_summary(*tables, filters)
+    _assert_kpis_equal(kpis, get_kpis(*apply_filters(*tables, filters)))
+
+
+def test_searches_fall_back_to_rows(tables):
+    assert dashboard_summary(*tables, {"date_from": None, "date_to": None, "search": "repair"}) is None
+
+
+def test_appended_rows_extend_the_cubes(datasets):
+    grown, fresh = [], []
+    for name in ("invoices", "jobs", "customers", "estimates"):
+        records = datasets[name]
+        old = build_table(name, records[:400])
+        builder = TableBuilder(name, head=old)
+        builder.append(records[400:])
+        grown.append((old, builder))
+        fresh.append(build_table(name, records))
+    for filters in FILTERS:                                 # build every cube of the old tables
+        dashboard_summary(*(old for old, _ in grown), {"search": "", **filters})
+    grown = [builder.finish() for _, builder in grown]
+    for table in grown:                                     # extended, not rebuilt on demand
+        assert all(("rollup", f) in table.base._derived for f in CUBE_FIELDS.get(table.name, ()))
+    for filters in FILTERS:
+        filters = {"search": "", **filters}
+        kpis, charts = dashboard_summary(*grown, filters)
+        expected_kpis, expected = dashboard_summary(*fresh, filters)
+        _assert_kpis_equal(kpis, expected_kpis)
+        for chart in CHARTS:
+            pd.testing.assert_frame_equal(charts[chart], expected[chart], check_exact=False, obj=chart)
@@ -0,0 +1,103 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from graphics.columnar import build_table
+from graphics.flat_frame import flat_frame
+from graphics.geo_index import geo_counts
+from graphics.incremental import source_state
+from graphics.snapshot import FORMAT, load_snapshot, save_snapshot, snapshot_path
+
+
+def _export(tmp_path, name, records):
+    path = tmp_path / f"{name}_data.json"
+    path.write_text(json.dumps(records), encoding="utf-8")
+    return str(path)
+
+
+def _loader(records):
+    return lambda n_rows: (lambda: records[:n_rows])
+
+
+def _assert_same(a, b):
+    assert len(a) == len(b)
+    assert set(a.base._columns) == set(b.base._columns)
+    for field in a.base._columns:
+        assert a.base._columns[field].dtype == b.base._columns[field].dtype
+        assert np.array_equal(a.base._columns[field], b.base._columns[field],
+                              equal_nan=a.base._columns[field].dtype.kind == "f")
+        assert np.array_equal(a.base._present[field], b.base._present[field])
+    assert a.base._categories == b.base._categories
+
+
+def test_round_trip(tmp_path, datasets):
+    for name, records in datasets.items():
+        path = _export(tmp_path, name, records)
+        digest = source_state(path)["digest"]
+        table = build_table(name, records, version=digest)
+        assert save_snapshot(table, path, digest, {"malformed": 2})
+        loaded, report = load_snapshot(path, digest, name, _loader(records))
+        _assert_same(table, loaded)
+        assert report == {"records": len(records), "malformed": 2, "error": None}
+        assert not loaded.records_loaded and loaded.records == records
+        assert loaded.version == digest
+
+
+def _no_records(n_rows):
+    def load():
+        raise AssertionError("records parsed")
+    return load
+
+
+def test_derived_data_round_trip(tmp_path, datasets):
+    for name, records in datasets.items():
+        path = _export(tmp_path, name, records)
+        table = build_table(name, records)
+        expected = {level: geo_counts(table, level) for level in ("country", "state", "zip3")}
+        frame = flat_frame(table).copy()
+        save_snapshot(table, path, "d", {})
+        loaded, _ = load_snapshot(path, "d", name, _no_records)
+        assert {level: geo_counts(loaded, level) for level in expected} == expected
+        pd.testing.assert_frame_equal(flat_frame(loaded), frame)
+        view = np.arange(0, len(records), 3)
+        pd.testing.assert_frame_equal(flat_frame(loaded.take(view)), flat_frame(table.take(view)))
+        assert not loaded.records_loaded
+
+
+def test_empty_table_round_trip(tmp_path):
+    path = _export(tmp_path, "jobs", [])
+    table = build_table("jobs", [], version="d")
+    assert save_snapshot(table, path, "d", {})
+    loaded, _ = load_snapshot(path, "d", "jobs", _loader([]))
+    _assert_same(table, loaded)
+
+
+def test_unusable_stores_are_ignored(tmp_path, datasets):
+    records = datasets["customers"]
+    path = _export(tmp_path, "customers", records)
+    table = build_table("customers", records)
+    save_snapshot(table, path, "d1", {})
+    assert load_snapshot(path, "other", "customers", _loader(records)) is None     # different export
+    assert load_snapshot(path, "d1", "jobs", _loader(records)) is None             # different dataset
+    meta = os.path.join(snapshot_path(path, "d1"), "meta.json")
+    with open(meta, encoding="utf-8") as f:
+        stale = {**json.load(f), "format": FORMAT - 1}
+    with open(meta, "w", encoding="utf-8") as f:
+        json.dump(stale, f)
+    assert load_snapshot(path, "d1", "customers", _loader(records)) is None        # older format
+    with open(meta, "w", encoding="utf-8") as f:
+        json.dump({**stale, "format": FORMAT}, f)
+    os.remove(os.path.join(snapshot_path(path, "d1"), "lead_source.offsets"))
+    assert load_snapshot(path, "d1", "customers", _loader(records)) is None        # incomplete store
+
+
+def test_new_version_replaces_the_old_store(tmp_path, datasets):
+    records = datasets["jobs"]
+    path = _export(tmp_path, "jobs", records)
+    save_snapshot(build_table("jobs", records), path, "v1", {})
+    save_snapshot(build_table("jobs", records[:10]), path, "v2", {})
+    assert not os.path.isdir(snapshot_path(path, "v1"))
+    loaded, _ = load_snapshot(path, "v2", "jobs", _loader(records))
+    assert len(loaded) == 10